@@ -0,0 +1 @@
+"""One module per dashboard page; the app script calls the open page's render(ctx)."""
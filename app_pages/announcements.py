@@ -0,0 +1,166 @@
+# ------------------------- SUPER ULTIMATE ANNOUNCEMENTS (WITH PROPER COMMENTS & DELETE) -------------------------
+import datetime
+import os
+
+import pandas as pd
+import streamlit as st
+
+from kmfx import writer as db_writer
+from kmfx.db import get_connection
+from app_pages.common import add_log, card_row, hand_to_card, read_row, rerun_card
+
+
+def render(ctx):
+    conn = ctx.conn
+    st.markdown("<div class='content-card'>", unsafe_allow_html=True)
+
+    if st.session_state.is_owner or st.session_state.is_admin:
+        # ====================== POST NEW ANNOUNCEMENT ======================
+        st.header("📢 Announcements")
+        st.markdown("#### Post updates with images and files")
+
+        with st.form("post_announcement", clear_on_submit=True):
+            title = st.text_input("Title *")
+            message = st.text_area("Message *", height=200)
+            files = st.file_uploader("Attach images or files", accept_multiple_files=True)
+
+            if st.form_submit_button("📢 POST ANNOUNCEMENT", type="primary"):
+                if not title.strip() or not message.strip():
+                    st.error("Title and message are required!")
+                else:
+                    try:
+                        poster = "Owner" if st.session_state.is_owner else "Admin"
+
+                        def _post_announcement(cur):
+                            cur.execute("""INSERT INTO announcements 
+                                               (title, message, date, posted_by, likes)
+                                               VALUES (?, ?, ?, ?, 0)""",
+                                        (title, message, datetime.date.today().isoformat(), poster))
+                            ann_id = cur.lastrowid
+                            cur.executemany("""INSERT INTO announcement_files 
+                                                   (announcement_id, file_name, original_name)
+                                                   VALUES (?, ?, ?)""",
+                                            [(ann_id, f"{ann_id}_{file.name}", file.name) for file in files or []])
+                            return ann_id
+
+                        ann_id = db_writer.write(_post_announcement)
+
+                        # File names carry the announcement id, so they are saved once it is known
+                        for file in files or []:
+                            with open(f"uploaded_files/announcements/{ann_id}_{file.name}", "wb") as f:
+                                f.write(file.getbuffer())
+
+                        add_log("Announcement Posted", title)
+                        st.success("Announcement posted successfully!")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+
+        st.markdown("---")
+
+    # ====================== DISPLAY ANNOUNCEMENTS (ALL USERS) ======================
+    st.subheader("Latest Announcements")
+
+    announcements = pd.read_sql("""
+            SELECT id, title, message, date, posted_by, likes
+            FROM announcements
+            ORDER BY date DESC
+            LIMIT 20
+        """, conn)
+
+    # === ONE FRAGMENT PER CARD: A LIKE OR COMMENT RERUNS ONLY ITS OWN CARD ===
+    @st.fragment
+    def announcement_card(ann):
+        ann = card_row(f"ann_{ann['id']}", ann, lambda: read_row(
+            "SELECT id, title, message, date, posted_by, likes FROM announcements WHERE id = ?", (ann['id'],)))
+        if ann is None:
+            return
+
+        with st.expander(f"📢 {ann['title']} • {ann['date']} • by {ann['posted_by']} • ❤️ {ann['likes']} likes", expanded=True):
+            st.write(ann['message'])
+
+            # === IMAGE PREVIEWS ===
+            atts = pd.read_sql("SELECT file_name, original_name FROM announcement_files WHERE announcement_id = ?", get_connection(), params=(ann['id'],))
+            images = []
+            files = []
+
+            for _, att in atts.iterrows():
+                path = f"uploaded_files/announcements/{att['file_name']}"
+                if os.path.exists(path):
+                    if att['original_name'].lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp')):
+                        images.append((path, att['original_name']))
+                    else:
+                        files.append((path, att['original_name']))
+
+            if images:
+                st.markdown("**Images:**")
+                cols = st.columns(min(3, len(images)))
+                for i, (img_path, name) in enumerate(images):
+                    with cols[i % 3]:
+                        st.image(img_path, caption=name, use_column_width=True)
+
+            if files:
+                st.markdown("**Files:**")
+                for file_path, name in files:
+                    with open(file_path, "rb") as f:
+                        st.download_button(f"📎 {name}", f.read(), file_name=name, use_container_width=True)
+
+            # === LIKE BUTTON ===
+            if st.button(f"❤️ Like ({ann['likes']})", key=f"like_{ann['id']}"):
+                db_writer.execute("UPDATE announcements SET likes = likes + 1 WHERE id = ?", (ann['id'],))
+                rerun_card()
+
+            # === COMMENTS SECTION ===
+            st.markdown("**💬 Comments**")
+
+            # Post new comment
+            with st.form(key=f"comment_form_{ann['id']}", clear_on_submit=True):
+                comment_text = st.text_input("Write a comment...", key=f"input_{ann['id']}")
+                col_send, _ = st.columns([1, 4])
+                with col_send:
+                    send = st.form_submit_button("Send")
+
+                if send and comment_text.strip():
+                    commenter = (st.session_state.current_client['name']
+                                 if not (st.session_state.is_owner or st.session_state.is_admin)
+                                 else "Owner/Admin")
+                    db_writer.execute("""INSERT INTO announcement_comments
+                                             (announcement_id, commenter_name, comment, timestamp)
+                                             VALUES (?, ?, ?, ?)""",
+                                      (ann['id'], commenter, comment_text.strip(), datetime.datetime.now().isoformat()))
+                    add_log("Comment", f"{commenter} on '{ann['title']}'")
+                    st.success("Comment posted!")
+                    rerun_card()
+
+            # Display comments
+            comments = pd.read_sql("""
+                    SELECT commenter_name, comment, timestamp, id
+                    FROM announcement_comments
+                    WHERE announcement_id = ?
+                    ORDER BY timestamp ASC
+                """, get_connection(), params=(ann['id'],))
+
+            if not comments.empty:
+                for _, com in comments.iterrows():
+                    col_name, col_comment, col_delete = st.columns([2, 6, 1])
+                    with col_name:
+                        st.caption(f"**{com['commenter_name']}** • {com['timestamp'][:16].replace('T', ' ')}")
+                    with col_comment:
+                        st.write(com['comment'])
+                    with col_delete:
+                        if st.session_state.is_owner or st.session_state.is_admin:
+                            if st.button("🗑️", key=f"del_com_{com['id']}"):
+                                db_writer.execute("DELETE FROM announcement_comments WHERE id = ?", (com['id'],))
+                                add_log("Comment Deleted", f"ID {com['id']} on announcement {ann['id']}")
+                                rerun_card()
+            else:
+                st.caption("No comments yet. Be the first!")
+
+    if announcements.empty:
+        st.info("No announcements yet. Stay tuned for updates!")
+    else:
+        for ann in announcements.to_dict("records"):
+            hand_to_card(f"ann_{ann['id']}")
+            announcement_card(ann)
+
+    st.markdown("</div>", unsafe_allow_html=True)
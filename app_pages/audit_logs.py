@@ -0,0 +1,124 @@
+# ------------------------- SUPER ULTIMATE AUDIT LOGS (FULLY FIXED - NO ERRORS) -------------------------
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+
+
+def render(ctx):
+    conn = ctx.conn
+    if not st.session_state.is_owner:
+        st.markdown("<div class='content-card'>", unsafe_allow_html=True)
+        st.error("🚫 Access Denied")
+        st.write("Audit Logs are only available to Owner.")
+        st.markdown("</div>", unsafe_allow_html=True)
+    else:
+        st.markdown("<div class='content-card'>", unsafe_allow_html=True)
+        st.header("📜 Audit Logs")
+        st.markdown("#### Complete system activity history with advanced filtering")
+
+        # Load all logs safely
+        all_logs = pd.read_sql("""
+                SELECT timestamp, action, details, user_type, user_id
+                FROM logs
+                ORDER BY timestamp DESC
+            """, conn)
+
+        if all_logs.empty:
+            st.info("No activity logged yet. All actions will appear here in real-time.")
+        else:
+            # Filters
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                action_filter = st.multiselect(
+                    "Filter by Action",
+                    options=sorted(all_logs['action'].unique()),
+                    default=[]
+                )
+            with col2:
+                type_filter = st.multiselect(
+                    "Filter by User Type",
+                    options=sorted(all_logs['user_type'].dropna().unique()),
+                    default=[]
+                )
+            with col3:
+                search_text = st.text_input("Search in Details")
+            with col4:
+                if 'timestamp' in all_logs.columns and not all_logs.empty:
+                    min_date = pd.to_datetime(all_logs['timestamp']).min().date()
+                    max_date = pd.to_datetime(all_logs['timestamp']).max().date()
+                    date_range = st.date_input(
+                        "Date Range",
+                        value=(min_date, max_date),
+                        min_value=min_date,
+                        max_value=max_date
+                    )
+                else:
+                    date_range = None
+
+            # Apply filters
+            filtered = all_logs.copy()
+            if 'timestamp' in filtered.columns:
+                filtered['date'] = pd.to_datetime(filtered['timestamp'], errors='coerce').dt.date
+
+            if action_filter:
+                filtered = filtered[filtered['action'].isin(action_filter)]
+            if type_filter:
+                filtered = filtered[filtered['user_type'].isin(type_filter)]
+            if search_text:
+                filtered = filtered[filtered['details'].str.contains(search_text, case=False, na=False)]
+            if date_range and len(date_range) == 2:
+                filtered = filtered[
+                    (filtered['date'] >= date_range[0]) &
+                    (filtered['date'] <= date_range[1])
+                ]
+
+            # Display count
+            st.success(f"📊 Showing {len(filtered)} log entries (out of {len(all_logs)} total)")
+
+            # Formatted display
+            display_logs = filtered.copy()
+            display_logs['timestamp'] = pd.to_datetime(display_logs['timestamp'], errors='coerce').dt.strftime('%b %d, %Y • %H:%M:%S')
+
+            # === SAFE CLIENT NAME ENRICHMENT (NO KEYERROR) ===
+            display_logs['client'] = ""
+            if 'user_id' in filtered.columns:
+                user_ids = filtered['user_id'].dropna().unique()
+                if len(user_ids) > 0:
+                    client_names = {}
+                    for uid in user_ids:
+                        try:
+                            name_df = pd.read_sql(f"SELECT name FROM clients WHERE id = {int(uid)}", conn)
+                            if not name_df.empty:
+                                client_names[int(uid)] = name_df.iloc[0]['name']
+                        except:
+                            pass
+                    display_logs['client'] = display_logs['user_id'].map(client_names).fillna("")
+
+            # Final columns
+            display_cols = ['timestamp', 'action', 'details', 'user_type', 'client']
+            display_logs = display_logs[[col for col in display_cols if col in display_logs.columns]]
+
+            st.dataframe(display_logs, use_container_width=True, hide_index=True)
+
+            # Export buttons
+            csv_filtered = filtered.to_csv(index=False).encode()
+            st.download_button(
+                "📥 Export Filtered Logs CSV",
+                csv_filtered,
+                f"KMFX_Audit_Logs_Filtered_{datetime.date.today().isoformat()}.csv",
+                "text/csv",
+                use_container_width=True
+            )
+
+            csv_all = all_logs.to_csv(index=False).encode()
+            st.download_button(
+                "📥 Export ALL Logs CSV",
+                csv_all,
+                f"KMFX_Full_Audit_Logs_{datetime.date.today().isoformat()}.csv",
+                "text/csv",
+                use_container_width=True
+            )
+
+        st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,236 @@
+# ------------------------- SUPER ULTIMATE CLIENT MANAGEMENT (FINAL FIXED - REFERRALS WORK ON CREATE, REALTIME, NO BUGS) -------------------------
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from kmfx import referrals
+from kmfx import writer as db_writer
+from app_pages.common import add_log, generate_referral_code, hash_password, load_clients
+
+
+def render(ctx):
+    conn = ctx.conn
+    st.markdown("<div class='content-card'>", unsafe_allow_html=True)
+    st.header("👥 Client Management")
+    st.markdown("#### Complete client control center")
+
+    df_clients = load_clients()
+
+    tab1, tab2, tab3, tab4 = st.tabs(["🔍 All Clients", "➕ Add Client", "✏️ Edit Client", "🔑 Set Login"])
+
+    with tab1:
+        st.subheader("All Clients")
+        search = st.text_input("Search by Name, Mobile, Address, or Referral Code", key="cm_search")
+
+        filtered = df_clients
+        if search:
+            search_lower = search.lower()
+            filtered = df_clients[
+                df_clients['name'].str.lower().str.contains(search_lower, na=False) |
+                df_clients['mobile_number'].astype(str).str.lower().str.contains(search_lower, na=False) |
+                df_clients['address'].astype(str).str.lower().str.contains(search_lower, na=False) |
+                df_clients['referral_code'].astype(str).str.lower().str.contains(search_lower, na=False)
+            ]
+
+        if filtered.empty:
+            st.info("No clients found.")
+        else:
+            display = filtered.copy()
+            display['current_equity'] = display['current_equity'].apply(lambda x: f"${x:,.2f}")
+            display['withdrawable_balance'] = display['withdrawable_balance'].apply(lambda x: f"${x:,.2f}")
+            display['start_balance'] = display['start_balance'].apply(lambda x: f"${x:,.2f}")
+            display['add_date'] = pd.to_datetime(display['add_date'], errors='coerce').dt.strftime('%b %d, %Y')
+            display['expiry'] = pd.to_datetime(display['expiry'], errors='coerce').dt.strftime('%b %d, %Y')
+
+            cols = ['name', 'type', 'mobile_number', 'address', 'accounts', 'referral_code', 'referred_by',
+            'current_equity', 'withdrawable_balance', 'start_balance', 'add_date', 'expiry']
+            display = display[[c for c in cols if c in display.columns]]
+            display.rename(columns={
+            'name': 'Name', 'type': 'Type', 'mobile_number': 'Mobile', 'address': 'Address',
+            'accounts': 'Accounts', 'referral_code': 'Referral Code', 'referred_by': 'Referred By (ID)',
+            'current_equity': 'Equity', 'withdrawable_balance': 'Withdrawable',
+            'start_balance': 'Start Balance', 'add_date': 'Joined', 'expiry': 'Expiry'
+            }, inplace=True)
+
+            st.dataframe(display, use_container_width=True, hide_index=True)
+
+            csv = filtered.to_csv(index=False).encode()
+            st.download_button("📥 Export CSV", csv, "KMFX_Clients.csv", "text/csv", use_container_width=True)
+
+    with tab2:
+        st.subheader("Add New Client")
+        with st.form("add_client_form", clear_on_submit=True):
+            c1, c2 = st.columns(2)
+            with c1:
+                name = st.text_input("Full Name *")
+                mobile = st.text_input("Mobile Number *")
+                client_type = st.selectbox("Type *", ["Regular", "Pioneer"])
+                accounts = st.text_input("Accounts *")
+            with c2:
+                address = st.text_area("Address *")
+                start_bal = st.number_input("Starting Balance ($)", min_value=0.0, value=10000.0, step=500.0)
+                expiry = st.date_input("Expiry Date", value=datetime.date.today() + datetime.timedelta(days=365))
+
+            # === FINAL ROBUST REFERRAL FIX (WORKS ON CREATE) ===
+            pioneers_df = pd.read_sql("SELECT id, name FROM clients WHERE type = 'Pioneer' ORDER BY name", conn)
+
+            if pioneers_df.empty:
+                st.info("No Pioneer clients yet. Add a Pioneer first to enable referrals.")
+                referred_by = 0
+                ref_display = "No Referral"
+            else:
+                ref_options = ["None"] + pioneers_df['name'].tolist()
+                ref_name = st.selectbox("Referred By (Pioneer)", ref_options, index=0)
+
+                if ref_name == "None":
+                    referred_by = 0
+                    ref_display = "No Referral"
+                else:
+                    # Safe & exact match
+                    matched = pioneers_df[pioneers_df['name'] == ref_name]
+                    if not matched.empty:
+                        referred_by = int(matched['id'].iloc[0])
+                        ref_display = ref_name
+                    else:
+                        st.error("Selected Pioneer not found. Please try again.")
+                        referred_by = 0
+                        ref_display = "Error"
+
+            submit = st.form_submit_button("➕ ADD CLIENT", type="primary")
+
+            if submit:
+                if not all([name.strip(), mobile.strip(), address.strip(), accounts.strip()]):
+                    st.error("All required fields must be filled!")
+                else:
+                    try:
+                        def _insert_client(cur):
+                            cur.execute("""INSERT INTO clients
+                                               (name, type, accounts, expiry, start_balance, current_equity,
+                                                withdrawable_balance, add_date, referred_by, address, mobile_number)
+                                               VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?, ?, ?)""",
+                                        (name.strip(), client_type, accounts.strip(), expiry.isoformat(),
+                                         start_bal, start_bal, datetime.date.today().isoformat(),
+                                         referred_by, address.strip(), mobile.strip()))
+                            new_id = cur.lastrowid
+                            referrals.add_client(cur, new_id, referred_by)
+                            ref_code = generate_referral_code(name.strip(), new_id, cur)
+                            cur.execute("UPDATE clients SET referral_code = ? WHERE id = ?", (ref_code, new_id))
+                            return new_id, ref_code
+
+                        new_id, ref_code = db_writer.write(_insert_client)
+
+                        add_log("Client Added", f"{name} ({client_type}) | Referred by: {ref_display} (ID: {referred_by})")
+
+                        st.success(f"✅ Client '{name}' added successfully!\n\n"
+                               f"Referral Code: `{ref_code}`\n"
+                               f"Referred by: {ref_display} (DB ID: {referred_by})")
+                        st.rerun()
+
+                    except Exception as e:
+                        st.error(f"Error adding client: {e}")
+                        print(f"Add client error: {e}")
+
+    with tab3:
+        st.subheader("Edit Client")
+        if df_clients.empty:
+            st.info("No clients to edit.")
+        else:
+            client_map = dict(zip(df_clients['name'], df_clients['id']))
+            sel_name = st.selectbox("Select Client", options=list(client_map.keys()))
+            client_id = client_map[sel_name]
+            client = df_clients[df_clients['id'] == client_id].iloc[0].to_dict()
+
+            with st.form("edit_client_form"):
+                c1, c2 = st.columns(2)
+                with c1:
+                    new_name = st.text_input("Name", value=client['name'])
+                    new_mobile = st.text_input("Mobile", value=client.get('mobile_number', ''))
+                    new_type = st.selectbox("Type", ["Regular", "Pioneer"], index=0 if client['type'] == "Regular" else 1)
+                    new_accounts = st.text_input("Accounts", value=client['accounts'] or "")
+                with c2:
+                    new_address = st.text_area("Address", value=client.get('address', ''))
+                    exp_date = pd.to_datetime(client['expiry'], errors='coerce') or datetime.date.today() + datetime.timedelta(days=365)
+                    new_expiry = st.date_input("Expiry", value=exp_date)
+
+                # Referral in Edit - SAME ROBUST FIX
+                pioneers_df = pd.read_sql("SELECT id, name FROM clients WHERE type = 'Pioneer'", conn)
+                current_ref_name = "None"
+                if client.get('referred_by') and client['referred_by'] != 0:
+                    ref_df = pd.read_sql(f"SELECT name FROM clients WHERE id = {client['referred_by']}", conn)
+                    if not ref_df.empty:
+                        current_ref_name = ref_df.iloc[0]['name']
+
+                ref_options = ["None"] + pioneers_df['name'].tolist()
+                ref_index = ref_options.index(current_ref_name) if current_ref_name in ref_options else 0
+                ref_name = st.selectbox("Referred By (Pioneer)", ref_options, index=ref_index)
+
+                referred_by = 0
+                if ref_name != "None":
+                    matched = pioneers_df[pioneers_df['name'] == ref_name]
+                    if not matched.empty:
+                        referred_by = int(matched['id'].iloc[0])
+
+                st.info(f"Equity: ${client['current_equity']:,.2f} | Withdrawable: ${client['withdrawable_balance']:,.2f}")
+
+                if st.form_submit_button("💾 Save Changes", type="primary"):
+                    try:
+                        old_name = client['name']
+
+                        def _update_client(cur):
+                            referrals.move_subtree(cur, client_id, referred_by)  # Rejects loops before anything is written
+                            cur.execute("""UPDATE clients
+                                               SET name=?, type=?, accounts=?, expiry=?, address=?, mobile_number=?, referred_by=?
+                                               WHERE id=?""",
+                                        (new_name.strip(), new_type, new_accounts.strip(), new_expiry.isoformat(),
+                                         new_address.strip(), new_mobile.strip(), referred_by, client_id))
+                            if new_name.strip() != old_name or new_type != client['type']:
+                                referrals.touch(cur, client_id)  # Name and type show in the referral trees above
+
+                            if new_name.strip().lower() != old_name.lower():
+                                new_ref_code = generate_referral_code(new_name.strip(), client_id, cur)
+                                cur.execute("UPDATE clients SET referral_code = ? WHERE id = ?", (new_ref_code, client_id))
+
+                        db_writer.write(_update_client)
+
+                        add_log("Client Updated", f"ID {client_id} | {new_name} | Referred by: {ref_name}")
+
+                        st.success("Updated successfully!")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+
+    with tab4:
+        st.subheader("Set Client Login")
+        if df_clients.empty:
+            st.info("No clients yet.")
+        else:
+            client_map = dict(zip(df_clients['name'], df_clients['id']))
+            sel_name = st.selectbox("Select Client", options=list(client_map.keys()), key="login_sel")
+            client_id = client_map[sel_name]
+
+            with st.form("set_login_form"):
+                username = st.text_input("Username *")
+                pw1 = st.text_input("Password *", type="password")
+                pw2 = st.text_input("Confirm Password *", type="password")
+
+                if st.form_submit_button("🔐 Set Login", type="primary"):
+                    if not username or not pw1:
+                        st.error("Username and password required!")
+                    elif pw1 != pw2:
+                        st.error("Passwords do not match!")
+                    elif len(pw1) < 8:
+                        st.error("Password must be at least 8 characters!")
+                    else:
+                        try:
+                            hashed = hash_password(pw1)
+                            db_writer.execute("INSERT OR REPLACE INTO users (client_id, username, password) VALUES (?, ?, ?)",
+                                              (client_id, username.strip(), hashed))
+
+                            add_log("Client Login Set", f"Client {sel_name} | Username: {username}")
+                            st.success("Login credentials set!")
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Error: {e}")
+
+    st.markdown("</div>", unsafe_allow_html=True)
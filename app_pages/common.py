@@ -0,0 +1,222 @@
+# ==================== KMFX PAGE HELPERS ====================
+"""What the pages in app_pages/ share: the cached loaders, the write helpers,
+fragment cards and live updates.
+
+The app script builds a PageContext once per run and calls the open page's
+render(ctx). Helpers read through get_connection(), which hands each script
+thread its own connection (see kmfx/db.py), so a fragment rerun never uses a
+connection from a run that has finished.
+"""
+
+import datetime
+import sqlite3
+
+import pandas as pd
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+from kmfx import audit, events, referrals, rollups, swr, table_versions
+from kmfx import writer as db_writer
+from kmfx.db import get_connection
+
+
+class PageContext:
+    """Per-run state a page needs from the app script: its connection and the active theme's colours."""
+
+    def __init__(self, conn, accent, surface_color, border_color):
+        self.conn = conn
+        self.accent = accent
+        self.surface_color = surface_color
+        self.border_color = border_color
+
+
+# bcrypt is imported on first use: only the login and password pages hash anything
+def hash_password(pw: str) -> str:
+    import bcrypt
+    return bcrypt.hashpw(pw.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+def check_password(pw: str, hashed: str) -> bool:
+    import bcrypt
+    return bcrypt.checkpw(pw.encode('utf-8'), hashed.encode('utf-8'))
+
+def add_log(action, details="", user_type="System", user_id=None):
+    # Buffered: written in batches by kmfx.audit, never waits on the database
+    audit.log(action, details, user_type, user_id)
+
+# === CACHED LOADERS (KEYED ON SOURCE TABLE VERSIONS, SEE kmfx/table_versions.py & kmfx/swr.py) ===
+# A write bumps its table's version in the same transaction, so a cached frame is
+# reused until its own source tables change - no TTL, no manual clearing.
+# stale_ok=True serves the last good frame at once and re-reads it in the background
+# (Dashboard Home, Reports & Export); pages that just wrote must read fresh.
+def _read_clients():
+    df = pd.read_sql("SELECT * FROM clients", get_connection())
+    numeric_cols = ['start_balance', 'current_equity', 'withdrawable_balance']
+    for col in numeric_cols:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    return df
+
+def load_clients(stale_ok=False):
+    return swr.get("clients", table_versions.get(get_connection(), "clients"), _read_clients, stale_ok)
+
+def load_profits_summary(stale_ok=False):
+    # Firm-wide monthly totals from profit_rollup_monthly (kmfx/rollups.py), not the whole profits table
+    return swr.get("profits_summary", table_versions.get(get_connection(), "profits"),
+                   lambda: rollups.monthly(get_connection()), stale_ok)
+
+def load_withdrawals(stale_ok=False):
+    return swr.get("withdrawals", table_versions.get(get_connection(), "withdrawals"),
+                   lambda: pd.read_sql("SELECT amount, status, date_requested, date_processed FROM withdrawals", get_connection()),
+                   stale_ok)
+
+def load_profit_report(stale_ok=False):
+    return swr.get("profit_report", table_versions.get(get_connection(), "profits", "clients"),
+                   lambda: pd.read_sql("""SELECT p.*, c.name, c.type
+                                          FROM profits p
+                                          JOIN clients c ON p.client_id = c.id
+                                          ORDER BY p.date DESC""", get_connection()),
+                   stale_ok)
+
+def load_withdrawal_report(stale_ok=False):
+    return swr.get("withdrawal_report", table_versions.get(get_connection(), "withdrawals", "clients"),
+                   lambda: pd.read_sql("""SELECT w.*, c.name, c.type
+                                          FROM withdrawals w
+                                          JOIN clients c ON w.client_id = c.id
+                                          ORDER BY w.date_requested DESC""", get_connection()),
+                   stale_ok)
+
+def show_staleness(*loaders):
+    """Caption under a page header while any of its stale_ok loaders is being re-read."""
+    statuses = [swr.status(name) for name in loaders]
+    if any(refreshing for _, refreshing in statuses):
+        as_of = min(loaded_at for loaded_at, _ in statuses if loaded_at)
+        st.caption(f"⏳ Showing data as of {datetime.datetime.fromtimestamp(as_of):%H:%M:%S} - "
+                   "newer figures are loading in the background and appear on your next action.")
+
+# Keyed on the subtree version, so a Pioneer's tree is only re-read after something under it changes
+@st.cache_data(max_entries=500)
+def load_referral_tree(client_id, version):
+    return referrals.subtree(get_connection(), client_id)
+
+# Non-cached for logs (always fresh)
+def load_recent_logs():
+    return pd.read_sql("SELECT action, details, timestamp FROM logs ORDER BY timestamp DESC LIMIT 20", get_connection())
+
+# === OPTIMIZED REFERRAL CODE (FAST & SAFE) ===
+def generate_referral_code(name, client_id, db=None):
+    db = get_connection() if db is None else db  # Pass the writer's cursor when called inside a write
+    base = ''.join(e for e in name.lower().replace(" ", "") if e.isalnum())
+    code_base = f"{base}{client_id}"
+    
+    # Prefix match as a range so it can use the referral_code unique index (LIKE cannot)
+    upper = code_base[:-1] + chr(ord(code_base[-1]) + 1)
+    existing = [row[0] for row in db.execute(
+        "SELECT referral_code FROM clients WHERE referral_code >= ? AND referral_code < ?", (code_base, upper))]
+    
+    suffixes = []
+    for code in existing:
+        if code.startswith(code_base):
+            suffix = code[len(code_base):]
+            if suffix.isdigit():
+                suffixes.append(int(suffix))
+    
+    counter = 1
+    while counter in suffixes:
+        counter += 1
+    
+    return code_base if counter == 1 else f"{code_base}{counter}"
+
+# === MESSAGES: ROW + ATTACHMENTS IN ONE COMMIT, FILES SAVED ONCE THE ID IS KNOWN ===
+def send_message(message, files, from_client_id=None, from_admin=None, to_client_id=None):
+    def _insert_message(cur):
+        cur.execute("""INSERT INTO messages
+                       (from_client_id, from_admin, to_client_id, message, timestamp)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    (from_client_id, from_admin, to_client_id, message or "", datetime.datetime.now().isoformat()))
+        msg_id = cur.lastrowid
+        cur.executemany("""INSERT INTO message_attachments
+                           (message_id, file_name, original_name)
+                           VALUES (?, ?, ?)""",
+                        [(msg_id, f"{msg_id}_{file.name}", file.name) for file in files or []])
+        return msg_id
+
+    msg_id = db_writer.write(_insert_message)
+    for file in files or []:
+        with open(f"uploaded_files/messages/{msg_id}_{file.name}", "wb") as f:
+            f.write(file.getbuffer())
+    events.publish("message_sent", from_client_id or to_client_id, message_id=msg_id, from_admin=from_admin)
+    return msg_id
+
+# === WITHDRAWAL NOTIFICATION (RUNS INSIDE THE STATUS-CHANGE WRITE) ===
+def notify_withdrawal_client(cur, withdrawal_id, title, message):
+    try:
+        cur.execute("""INSERT INTO notifications
+                       (client_id, title, message, category, date, read)
+                       VALUES ((SELECT client_id FROM withdrawals WHERE id = ?), ?, ?, 'Withdrawal', ?, 0)""",
+                    (withdrawal_id, title, message, datetime.date.today().isoformat()))
+    except sqlite3.Error as e:
+        print(f"Notification error: {e}")
+
+# === REFRESH CURRENT CLIENT (CRITICAL FOR REALTIME) ===
+# The session keeps a snapshot of its own clients row stamped with the row's version
+# (kmfx/table_versions.py); it is only re-read after a write to that row.
+def refresh_current_client():
+    if st.session_state.get('client_id'):
+        try:
+            version = table_versions.row(get_connection(), "clients", st.session_state.client_id)  # Read first: a write in between only causes one extra re-read
+            if st.session_state.get('current_client') and st.session_state.get('current_client_version') == version:
+                return
+            client_data = pd.read_sql("SELECT * FROM clients WHERE id = ?", get_connection(), params=(st.session_state.client_id,))
+            if not client_data.empty:
+                st.session_state.current_client = client_data.iloc[0].to_dict()
+                st.session_state.current_client_version = version
+        except Exception as e:
+            st.error("Error refreshing profile data. Please re-login.")
+            print(f"Refresh client error: {e}")
+
+# === FRAGMENT CARDS (st.fragment): A CARD'S BUTTONS RERUN ONLY THAT CARD ===
+# A fragment rerun calls the card again with the arguments of the last full run, so a card
+# uses the row its page handed in once and re-reads it by id when it reruns on its own.
+def hand_to_card(key):
+    st.session_state.setdefault("fresh_cards", set()).add(key)
+
+def card_row(key, row, reload):
+    fresh = st.session_state.setdefault("fresh_cards", set())
+    if key in fresh:
+        fresh.discard(key)
+        return row
+    return reload()
+
+def rerun_card():
+    """Rerun only the current card; a card drawn as part of a full run reruns the app."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def read_row(sql, params):
+    """One row as a dict (None if it is gone), for card_row reloads."""
+    cur = get_connection().execute(sql, params)  # A card may rerun after its full run's thread is gone
+    found = cur.fetchone()
+    return dict(zip([col[0] for col in cur.description], found)) if found else None
+
+# === LIVE UPDATES (kmfx/events.py): A PAGE RERUNS ONLY WHEN AN EVENT FOR ITS SESSION ARRIVES ===
+# Every tick is a fragment rerun for each open page, so keep it well above a second
+EVENT_POLL_SECONDS = 10
+
+def subscribe_events(*kinds, where=None):
+    """This session's subscription: its own client's events, or every client's for staff. Take it before reading.
+
+    Staff see every client's events, so narrow them with where(event) to the ones the view draws.
+    """
+    if st.session_state.is_owner or st.session_state.is_admin:
+        return events.subscribe(events.topics(role="owner" if st.session_state.is_owner else "admin"), kinds, where)
+    return events.subscribe(events.topics(client_id=st.session_state.client_id), kinds, where)
+
+@st.fragment(run_every=EVENT_POLL_SECONDS)
+def live_updates(subscription, caption=None, changed=None):
+    """An in-memory check every few seconds; the page reruns once an event arrived (or changed() reports one)."""
+    if subscription.pending() or (changed is not None and changed()):
+        st.rerun()
+    if caption:
+        st.caption(caption)
@@ -0,0 +1,149 @@
+# ------------------------- SUPER ULTIMATE DASHBOARD HOME (LATEST FIXED - REALTIME KPIs) -------------------------
+import pandas as pd
+import plotly.express as px  # Only this page draws charts
+import streamlit as st
+
+from kmfx import kpi, rollups
+from app_pages.common import load_clients, load_profits_summary, show_staleness
+
+
+def render(ctx):
+    conn = ctx.conn
+    accent = ctx.accent
+    st.markdown("<div class='content-card'>", unsafe_allow_html=True)
+    st.header("📊 KMFX Elite Command Center")
+
+    # Firm-wide tables are only read for owner/admin; a client rerun touches its own rows by client_id
+    if st.session_state.is_owner or st.session_state.is_admin:
+        df_clients = load_clients(stale_ok=True)
+        monthly = load_profits_summary(stale_ok=True)
+        show_staleness("clients", "profits_summary")
+
+        # KPIs - one row kept current by triggers in the same transaction as every write (kmfx/kpi.py)
+        kpis = kpi.snapshot(conn)
+        total_revenue = kpis['total_revenue']
+        total_paid = kpis['paid_withdrawals']  # Only PAID (not Approved)
+        pending_wd = kpis['pending_withdrawals']
+        total_clients = kpis['total_clients']
+        active_clients = kpis['active_clients']
+        total_licenses = kpis['licenses_issued']
+
+        col1, col2, col3, col4, col5, col6 = st.columns(6)
+        col1.metric("💰 Total Revenue", f"${total_revenue:,.2f}")
+        col2.metric("✅ Paid Withdrawals", f"${total_paid:,.2f}")  # Now realtime!
+        col3.metric("⏳ Pending Requests", f"${pending_wd:,.2f}")
+        col4.metric("👥 Total Clients", total_clients)
+        col5.metric("🟢 Active Clients", active_clients)
+        col6.metric("🔑 Licenses Issued", total_licenses)
+
+        st.markdown("---")
+        # === 2 COLUMN LAYOUT ===
+        col_left, col_right = st.columns(2)
+        with col_left:
+            st.subheader("📈 Revenue Growth (Your Share + Referral Bonuses)")
+            if not monthly.empty:
+                monthly = monthly[monthly['period'] != ""].rename(columns={'period': 'date'})  # Skip undated records
+                monthly['total'] = monthly['your_share'] + monthly['referral_bonus']
+                fig = px.area(monthly, x='date', y='total',
+                              color_discrete_sequence=[accent])
+                fig.update_layout(
+                    template="plotly_dark" if st.session_state.theme == "dark" else "plotly_white",
+                    paper_bgcolor="rgba(0,0,0,0)",
+                    plot_bgcolor="rgba(0,0,0,0)",
+                    xaxis_title="Month",
+                    yaxis_title="Revenue ($)",
+                    showlegend=False,
+                    height=500
+                )
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("Revenue will appear here after first profit recorded.")
+
+            st.subheader("🏆 Top 5 Performing Clients")
+            if len(df_clients) > 0:
+                top = df_clients.nlargest(5, 'current_equity')[['name', 'type', 'current_equity']]
+                top['current_equity'] = top['current_equity'].apply(lambda x: f"${x:,.0f}")
+                top = top.rename(columns={'name': 'Client', 'type': 'Type', 'current_equity': 'Equity'})
+                st.dataframe(top, use_container_width=True, hide_index=True)
+            else:
+                st.info("Clients will appear as they grow their equity.")
+
+        with col_right:
+            st.subheader("📊 Profit Sources Breakdown")
+            if kpis['owner_share'] or kpis['referral_bonus']:
+                sources = pd.DataFrame({
+                    'Source': ['Your Share', 'Referral Bonuses'],
+                    'Amount': [kpis['owner_share'], kpis['referral_bonus']]
+                })
+                fig_pie = px.pie(sources, values='Amount', names='Source',
+                                color_discrete_sequence=[accent, "#f59e0b"],
+                                hole=0.4)
+                fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+                fig_pie.update_layout(
+                    template="plotly_dark" if st.session_state.theme == "dark" else "plotly_white",
+                    paper_bgcolor="rgba(0,0,0,0)",
+                    plot_bgcolor="rgba(0,0,0,0)",
+                    showlegend=False,
+                    height=400
+                )
+                st.plotly_chart(fig_pie, use_container_width=True)
+            else:
+                st.info("Profit sources will show after recording profits.")
+
+            st.subheader("💳 Recent Withdrawals")
+            recent_wd = pd.read_sql("SELECT amount, status, date_requested FROM withdrawals ORDER BY date_requested DESC LIMIT 8", conn)
+            if not recent_wd.empty:
+                for _, wd in recent_wd.iterrows():
+                    status = "✅ Paid" if wd['status'] == 'Paid' else "👍 Approved" if wd['status'] == 'Approved' else "⏳ Pending" if wd['status'] == 'Pending' else "❌ Rejected"
+                    st.markdown(f"{status} **${wd['amount']:,.2f}** • {wd['date_requested']}")
+            else:
+                st.info("No withdrawal activity yet.")
+
+    # === CLIENT PERSONAL DASHBOARD ===
+    else:
+        st.subheader("🌟 Your Personal Dashboard")
+        client = st.session_state.current_client  # Re-read by id when the menu was built this rerun
+        client_id = client['id']
+
+        # Per-client rollups: one row per day with profits, instead of every profit record
+        client_totals = rollups.totals(conn, client_id)
+        client_profits = rollups.daily(conn, client_id)
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("💰 Current Equity", f"${client['current_equity']:,.2f}")
+        col2.metric("💸 Withdrawable", f"${client['withdrawable_balance']:,.2f}")
+        total_earned = client_totals['client_share'] + client_totals['referral_bonus']
+        col3.metric("🌟 Total Earned", f"${total_earned:,.2f}")
+        col4.metric("📊 Profit Records", client_totals['records'])
+
+        if not client_profits.empty:
+            client_profits = client_profits[client_profits['period'] != ""].assign(date=lambda d: pd.to_datetime(d['period']))
+            if not client_profits.empty:
+                start_balance = client.get('start_balance', 0)
+                client_profits['equity'] = start_balance + client_profits['profit'].cumsum()
+                fig_client = px.line(client_profits, x='date', y='equity', title="Your Equity Growth Journey", color_discrete_sequence=[accent])
+                fig_client.update_layout(
+                    template="plotly_dark" if st.session_state.theme == "dark" else "plotly_white",
+                    paper_bgcolor="rgba(0,0,0,0)",
+                    plot_bgcolor="rgba(0,0,0,0)",
+                    height=450,
+                    xaxis_title="Date",
+                    yaxis_title="Equity ($)"
+                )
+                st.plotly_chart(fig_client, use_container_width=True)
+            else:
+                st.info("Your equity growth chart will appear after profits are recorded.")
+        else:
+            st.info("Your equity growth chart will appear after your first profit is recorded.")
+
+        st.subheader("💳 Your Recent Withdrawals")
+        recent_wd = pd.read_sql("SELECT amount, status, date_requested FROM withdrawals WHERE client_id = ? ORDER BY date_requested DESC LIMIT 8",
+                                conn, params=(client_id,))
+        if not recent_wd.empty:
+            for _, wd in recent_wd.iterrows():
+                status = "✅ Paid" if wd['status'] == 'Paid' else "👍 Approved" if wd['status'] == 'Approved' else "⏳ Pending" if wd['status'] == 'Pending' else "❌ Rejected"
+                st.markdown(f"{status} **${wd['amount']:,.2f}** • {wd['date_requested']}")
+        else:
+            st.info("No withdrawal requests yet.")
+
+    st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,179 @@
+# ------------------------- SUPER ULTIMATE LICENSE GENERATOR (LATEST FIXED - CLEAN, FAST, REALTIME) -------------------------
+import datetime
+import sqlite3
+
+import pandas as pd
+import streamlit as st
+
+from kmfx import events
+from kmfx import writer as db_writer
+from app_pages.common import add_log, load_clients
+
+
+def render(ctx):
+    conn = ctx.conn
+    if not st.session_state.is_owner:
+        st.markdown("<div class='content-card'>", unsafe_allow_html=True)
+        st.error("🚫 Access Denied")
+        st.write("License Generator is only available to Owner.")
+        st.markdown("</div>", unsafe_allow_html=True)
+    else:
+        st.markdown("<div class='content-card'>", unsafe_allow_html=True)
+        st.header("🔑 License Generator")
+        st.markdown("#### Generate secure EA licenses instantly")
+
+        df_clients = load_clients()
+
+        if df_clients.empty:
+            st.info("No clients available yet. Add them in Client Management first.")
+            st.stop()
+
+        # Client selector
+        client_options = {row['name']: row['id'] for _, row in df_clients.iterrows()}
+        selected_name = st.selectbox(
+            "Select Client",
+            options=list(client_options.keys()),
+            format_func=lambda x: f"{x} ({df_clients[df_clients['name']==x]['type'].iloc[0]})"
+        )
+        client_id = client_options[selected_name]
+        client = df_clients[df_clients['id'] == client_id].iloc[0]
+
+        st.info(f"""
+        **Client:** {client['name']} ({client['type']})  
+        **Accounts:** {client['accounts'] or 'Not set'}  
+        **Current Expiry:** {client.get('expiry', 'None')}
+        """)
+
+        # License options
+        col1, col2 = st.columns(2)
+        with col1:
+            new_expiry = st.date_input(
+                "New Expiry Date",
+                value=datetime.date.today() + datetime.timedelta(days=365),
+                min_value=datetime.date.today()
+            )
+            version = st.text_input("Version Name (optional)", placeholder="e.g. v3.5 Elite Pro")
+        with col2:
+            allow_live = st.checkbox("Allow Live Trading", value=True)
+            live_status = "LIVE" if allow_live else "DEMO ONLY"
+
+        st.markdown("---")
+
+        if st.button("🔐 GENERATE LICENSE", type="primary", use_container_width=True):
+            try:
+                # Generate unique key
+                today_str = datetime.date.today().strftime("%b%d%Y").upper()
+                unique_key = f"KMFX_{client['name'].upper().replace(' ', '_')}_{today_str}"
+
+                # Plain data for encryption
+                plain_data = f"{client['name']}|{client['accounts'] or ''}|{new_expiry}|{'1' if allow_live else '0'}"
+                enc_key = unique_key
+                enc_data = ''.join(
+                    format(ord(plain_data[i]) ^ ord(enc_key[i % len(enc_key)]), '02X')
+                    for i in range(len(plain_data))
+                )
+
+                # === NOTIFICATION FOR THE CLIENT ===
+                notification_message = f"""
+**New EA License Generated!** 🔑
+
+**Client:** {client['name']}  
+**Version:** {version or 'Latest'}  
+**Expiry:** {new_expiry.strftime('%B %d, %Y')}  
+**Trading:** {'🟢 Live Allowed' if allow_live else '🔴 Demo Only'}
+
+You can now view and download your license from **My Licenses** page.
+
+Thank you for being part of KMFX Elite!  
+Built by Faith, Shared for Generations.
+                """.strip()
+
+                # === SAVE LICENSE, NEW EXPIRY & NOTIFICATION IN ONE COMMIT ===
+                def _issue_license(cur):
+                    cur.execute("""INSERT INTO client_licenses
+                                       (client_id, key, enc_data, version, date_generated, expiry, allow_live)
+                                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                                (client_id, unique_key, enc_data, version or "Latest",
+                                 datetime.date.today().isoformat(), new_expiry.isoformat(),
+                                 1 if allow_live else 0))
+                    cur.execute("UPDATE clients SET expiry = ? WHERE id = ?", (new_expiry.isoformat(), client_id))
+                    try:
+                        cur.execute("""INSERT INTO notifications
+                                           (client_id, title, message, category, date, read)
+                                           VALUES (?, ?, ?, ?, ?, 0)""",
+                                    (client_id, "🔑 New License Issued!", notification_message, "License", datetime.date.today().isoformat()))
+                        return True
+                    except sqlite3.Error as e_notif:
+                        print(f"Notification error: {e_notif}")
+                        return False
+
+                noti_success = db_writer.write(_issue_license)
+                events.publish("license_generated", client_id, version=version or "Latest")
+
+                # === SUCCESS DISPLAY ===
+                st.success(f"✅ License generated successfully for **{client['name']}**!")
+                if noti_success:
+                    st.info("🔔 Client notified instantly via Notifications!")
+
+                col_a, col_b = st.columns(2)
+                with col_a:
+                    st.code(f"UNIQUE_KEY = \"{unique_key}\"", language="text")
+                with col_b:
+                    st.code(f"ENC_DATA = \"{enc_data}\"", language="text")
+
+                # Download file
+                license_content = f"""KMFX EA LICENSE
+=====================
+Client: {client['name']}
+Unique Key: {unique_key}
+Encrypted Data: {enc_data}
+Version: {version or 'Latest'}
+Generated: {datetime.date.today().strftime('%B %d, %Y')}
+Expiry: {new_expiry.strftime('%B %d, %Y')}
+Live Trading: {live_status}
+=====================
+Thank you for trusting KMFX Elite.
+Built by Faith, Shared for Generations.
+"""
+
+                st.download_button(
+                    label="📥 Download License File",
+                    data=license_content,
+                    file_name=f"KMFX_License_{client['name'].replace(' ', '_')}_{today_str}_{live_status}.txt",
+                    mime="text/plain",
+                    use_container_width=True
+                )
+
+                add_log("License Generated", f"{client['name']} | {version or 'Latest'} | {live_status} | Expiry: {new_expiry}")
+
+            except Exception as e:
+                st.error(f"Error generating license: {e}")
+                print(f"License gen error: {e}")
+
+        # === RECENT LICENSES FOR THIS CLIENT ===
+        st.markdown("---")
+        st.subheader("Recent Licenses (This Client)")
+        recent = pd.read_sql(f"""
+                SELECT date_generated, expiry, allow_live, version
+                FROM client_licenses
+                WHERE client_id = {client_id}
+                ORDER BY date_generated DESC
+                LIMIT 7
+            """, conn)
+
+        if not recent.empty:
+            today = datetime.date.today()
+            for _, r in recent.iterrows():
+                try:
+                    exp_date = pd.to_datetime(r['expiry']).date() if r['expiry'] else None
+                    status = "🟢 Active" if (exp_date is None or exp_date >= today) else "🔴 Expired"
+                except:
+                    status = "⚠️ Invalid"
+
+                live = "Live" if r['allow_live'] else "Demo"
+                ver = r['version'] or 'Latest'
+                st.markdown(f"• {status} **{r['date_generated']}** → {r['expiry'] or 'No expiry'} | {live} | {ver}")
+        else:
+            st.info("No previous licenses for this client.")
+
+        st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,210 @@
+# ------------------------- SUPER ULTIMATE MESSAGES SYSTEM (FULLY FIXED) -------------------------
+import html
+import re
+
+import pandas as pd
+import streamlit as st
+
+from kmfx import conversations
+from kmfx import writer as db_writer
+from kmfx.db import get_connection
+from app_pages.common import add_log, live_updates, send_message, subscribe_events
+
+
+# === THREAD WINDOW KEPT IN THE SESSION: RERUNS ONLY READ MESSAGES NEWER THAN THE LAST ONE SEEN ===
+def _with_times(msgs):
+    msgs['time_str'] = pd.to_datetime(msgs['timestamp'], errors='coerce', format='mixed').dt.strftime('%b %d, %H:%M').fillna("")
+    return msgs
+
+def load_thread(client_id):
+    key = f"chat_thread_{client_id}"
+    window = st.session_state.get(key)
+    if window is None:
+        msgs = conversations.window(get_connection(), client_id)
+        window = {"messages": _with_times(msgs), "has_older": len(msgs) == conversations.THREAD_PAGE}
+    else:
+        seen = window["messages"]
+        new = conversations.newer(get_connection(), client_id, int(seen['id'].max()) if not seen.empty else 0)
+        if not new.empty:
+            window["messages"] = pd.concat([seen, _with_times(new)], ignore_index=True)
+    st.session_state[key] = window
+    return window
+
+def load_older(client_id):
+    window = st.session_state[f"chat_thread_{client_id}"]
+    older = conversations.window(get_connection(), client_id, before_id=int(window["messages"]['id'].min()))
+    window["messages"] = pd.concat([_with_times(older), window["messages"]], ignore_index=True)
+    window["has_older"] = len(older) == conversations.THREAD_PAGE
+
+def older_button(client_id, window):
+    if window["has_older"]:
+        st.button("⬆️ Load older messages", key=f"load_older_{client_id}", on_click=load_older, args=(client_id,))
+
+# === THREAD RENDERING: ONE HTML BLOCK PER WINDOW, BUBBLES BUILT COLUMN-WISE ===
+def _fill(template, index, values):
+    """template with each {name} replaced by values[name]: a Series on index, or one string for every row."""
+    parts = re.split(r"\{(\w+)\}", template)
+    bubbles = pd.Series(parts[0], index=index, dtype=object)
+    for name, literal in zip(parts[1::2], parts[2::2]):
+        bubbles = bubbles + values[name] + literal
+    return bubbles
+
+def _escape(value):
+    if isinstance(value, pd.Series):
+        return value.fillna("").astype(str).map(html.escape)
+    return html.escape(str(value))
+
+def thread_html(msgs, left, left_bubble, right_bubble, **values):
+    """The whole window as one string: left_bubble where left is True, right_bubble elsewhere.
+
+    Every value is HTML-escaped before it goes into a bubble; newlines in a message become <br>.
+    """
+    values = {name: _escape(value) for name, value in dict(values, time=msgs['time_str'], message=msgs['message']).items()}
+    values['message'] = values['message'].str.replace("\n", "<br>", regex=False)
+    bubbles = _fill(left_bubble, msgs.index, values).where(left, _fill(right_bubble, msgs.index, values))
+    return "".join(bubbles)
+
+
+def render(ctx):
+    conn = ctx.conn
+    st.markdown("<div class='content-card'>", unsafe_allow_html=True)
+
+    # Define accent color based on current theme (SAFE INSIDE BLOCK)
+    if st.session_state.theme == "dark":
+        accent_color = "#3b82f6"  # Blue for dark
+        bubble_bg_client = "rgba(15, 25, 50, 0.8)"
+    else:
+        accent_color = "#2563eb"  # Blue for light
+        bubble_bg_client = "rgba(255, 255, 255, 0.9)"
+
+    # ====================== OWNER / ADMIN VIEW ======================
+    if st.session_state.is_owner or st.session_state.is_admin:
+        st.header("💬 Messages Center")
+        st.markdown("#### Private support chat with clients")
+
+        # Before the reads below. A client's message changes the inbox; a staff reply only the thread it went to.
+        # selected_id is read when an event arrives, so it is the conversation this run opened.
+        selected_id = None
+        live_updates(subscribe_events("message_sent", where=lambda event: (
+            event["data"].get("from_admin") is None or event["client_id"] == selected_id)))
+        # One indexed read of the per-client summaries kept by kmfx/conversations.py
+        inbox = conversations.inbox(conn)
+
+        if inbox.empty:
+            st.info("No messages yet. Clients will appear here when they send a message.")
+        else:
+            total_unread = inbox['unread'].sum()
+            if total_unread > 0:
+                st.success(f"📬 You have {total_unread} unread message(s)")
+
+            client_map = dict(zip(inbox['name'], inbox['id']))
+            unread_by_name = dict(zip(inbox['name'], inbox['unread']))
+            labels = {name: f"{name} {'🟢 ' + str(unread) + ' new' if unread > 0 else ''}" for name, unread in unread_by_name.items()}
+            selected_name = st.selectbox(
+                "Select Client Conversation",
+                options=list(client_map.keys()),
+                format_func=labels.get
+            )
+            selected_id = client_map[selected_name]
+
+            # Mark as read (skipped when nothing is unread, so idle reruns issue no write)
+            if unread_by_name[selected_name] > 0:
+                db_writer.execute("UPDATE messages SET read = 1 WHERE from_client_id = ? AND read = 0", (selected_id,))
+
+            # Chat thread: the latest page, then only what arrives after it
+            thread = load_thread(selected_id)
+
+            chat_container = st.container()
+            with chat_container:
+                older_button(selected_id, thread)
+                msgs = thread["messages"]
+                if not msgs.empty:
+                    st.markdown(thread_html(
+                        msgs, left=msgs['from_client_id'].notna(),
+                        # Client message
+                        left_bubble=f'<div style="text-align: left; margin: 15px 0;">'
+                                f'<div style="display: inline-block; background: {bubble_bg_client}; padding: 12px 18px; border-radius: 18px; max-width: 70%; backdrop-filter: blur(10px);">'
+                                '<p style="margin:0;"><strong>{client}</strong><br>{message}</p>'
+                                '<small style="opacity: 0.7;">{time}</small></div></div>',
+                        # Admin message
+                        right_bubble=f'<div style="text-align: right; margin: 15px 0;">'
+                                 f'<div style="display: inline-block; background: {accent_color}; padding: 12px 18px; border-radius: 18px; max-width: 70%; color: white;">'
+                                 '<p style="margin:0;"><strong>You ({sender})</strong><br>{message}</p>'
+                                 '<small style="opacity: 0.8;">{time}</small></div></div>',
+                        client=selected_name, sender=msgs['from_admin'].fillna("").replace("", "Support")),
+                        unsafe_allow_html=True)
+
+            # Reply form
+            st.markdown("---")
+            with st.form("reply_form", clear_on_submit=True):
+                reply_text = st.text_area("Type your reply", height=100)
+                reply_files = st.file_uploader("Attach files", accept_multiple_files=True, key=f"reply_files_{selected_id}")
+
+                if st.form_submit_button("📤 Send Reply", type="primary", use_container_width=True):
+                    if not reply_text and not reply_files:
+                        st.error("Write a message or attach a file.")
+                    else:
+                        try:
+                            sender = "Owner" if st.session_state.is_owner else "Admin"
+                            send_message(reply_text, reply_files, from_admin=sender, to_client_id=selected_id)
+                            add_log("Message Sent", f"To client {selected_name}")
+                            st.success("Reply sent!")
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Error: {e}")
+
+    # ====================== CLIENT VIEW ======================
+    else:
+        st.header("💬 Support Messages")
+        st.markdown("#### Chat with the KMFX team")
+
+        client_id = st.session_state.client_id
+        live_updates(subscribe_events("message_sent"))  # Before the reads below: new messages rerun the page
+
+        # Mark support replies read (skipped when there are none, so idle reruns issue no write)
+        if conversations.thread(conn, client_id)['unread_client'] > 0:
+            db_writer.execute("UPDATE messages SET read = 1 WHERE to_client_id = ? AND from_client_id IS NULL AND read = 0",
+                              (client_id,))
+
+        thread = load_thread(client_id)
+
+        chat_container = st.container()
+        with chat_container:
+            if thread["messages"].empty:
+                st.info("No messages yet. Start the conversation below!")
+            else:
+                older_button(client_id, thread)
+                msgs = thread["messages"]
+                st.markdown(thread_html(
+                    msgs, left=msgs['from_admin'].notna(),
+                    # Admin message
+                    left_bubble=f'<div style="text-align: left; margin: 15px 0;">'
+                            f'<div style="display: inline-block; background: {accent_color}; padding: 12px 18px; border-radius: 18px; max-width: 70%; color: white;">'
+                            '<strong>Support Team</strong><br>{message}<br>'
+                            '<small style="opacity: 0.8;">{time}</small></div></div>',
+                    # Client message
+                    right_bubble=f'<div style="text-align: right; margin: 15px 0;">'
+                             f'<div style="display: inline-block; background: {bubble_bg_client}; padding: 12px 18px; border-radius: 18px; max-width: 70%; backdrop-filter: blur(10px);">'
+                             '<strong>You</strong><br>{message}<br>'
+                             '<small style="opacity: 0.7;">{time}</small></div></div>'),
+                    unsafe_allow_html=True)
+
+        # Send message form
+        st.markdown("---")
+        with st.form("client_message_form", clear_on_submit=True):
+            client_message = st.text_area("Your message to support", height=100)
+            client_files = st.file_uploader("Attach files", accept_multiple_files=True, key="client_upload")
+
+            if st.form_submit_button("📤 Send Message", type="primary", use_container_width=True):
+                if not client_message and not client_files:
+                    st.error("Write a message or attach a file.")
+                else:
+                    try:
+                        send_message(client_message, client_files, from_client_id=client_id)
+                        add_log("Message Received", f"From client ID {client_id}")
+                        st.success("Message sent to support!")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+
+    st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,220 @@
+# ------------------------- SUPER ULTIMATE MY REFERRALS (FINAL FIXED - NO NAMEERROR, PERFECT TREE) -------------------------
+import html
+from collections import Counter
+
+import pandas as pd
+import streamlit as st
+
+from kmfx import referrals
+from app_pages.common import load_referral_tree, refresh_current_client
+
+
+def render(ctx):
+    conn = ctx.conn
+    accent = ctx.accent
+    st.markdown("<div class='content-card'>", unsafe_allow_html=True)
+
+    if st.session_state.is_owner or st.session_state.is_admin:
+        st.info("👑 This page is exclusive for Pioneer members.")
+        st.write("Pioneers can view their downline and referral earnings here.")
+        st.stop()
+
+    refresh_current_client()
+    client = st.session_state.current_client
+
+    if client['type'] != "Pioneer":
+        st.error("🚫 Access Denied")
+        st.write("My Referrals is only available to Pioneer members.")
+        st.stop()
+
+    st.header("🌳 My Referrals")
+    st.markdown("#### Your downline network & referral earnings")
+
+    client_id = client['id']
+
+    # === STATS ===
+    ref_bonus_total = pd.read_sql(f"""
+            SELECT COALESCE(SUM(referral_bonus), 0) FROM profits WHERE client_id = {client_id}
+        """, conn).iloc[0][0]
+
+    direct_refs, total_downline = referrals.downline_counts(conn, client_id)
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("🎁 Total Referral Bonus", f"${ref_bonus_total:,.2f}")
+    col2.metric("👥 Direct Referrals", direct_refs)
+    col3.metric("🌐 Total Downline", total_downline)
+    col4.metric("🔗 Your Referral Code", f"`{client.get('referral_code', 'N/A')}`")
+
+    st.code(f"https://yourdomain.com/register?ref={client.get('referral_code', 'yourcode')}", language="text")
+
+    st.markdown("---")
+
+    # === FIXED REFERRAL TREE (NO NAMEERROR) ===
+    st.subheader("🌿 Your Referral Tree")
+    st.markdown("#### Visual network of your growing downline")
+
+    tree_data = load_referral_tree(client_id, referrals.tree_version(conn, client_id))
+
+    if not tree_data:
+        st.info("🌱 Your downline is growing! Share your referral code to build your powerful network.")
+    else:
+        # === ONE HTML PAYLOAD FOR THE WHOLE TREE (COLLAPSIBLE LEVELS) ===
+        # Levels up to the slider are sent to the browser; anything deeper is summarised
+        # as a count and opened by focusing on that member.
+        TREE_OPEN_LEVELS = 2  # Levels expanded on load; deeper rendered levels start collapsed
+
+        downline_size = {}
+        def count_below(node):
+            downline_size[node['id']] = sum(1 + count_below(child) for child in node['children'])
+            return downline_size[node['id']]
+        for node in tree_data:
+            count_below(node)
+
+        members_with_downline = {}  # id -> (node, level); keyed by id, since names repeat
+        def index_members(nodes, level=1):
+            for node in nodes:
+                if node['children']:
+                    members_with_downline[node['id']] = (node, level)
+                    index_members(node['children'], level + 1)
+        index_members(tree_data)
+
+        col_levels, col_focus = st.columns([1, 2])
+        with col_levels:
+            max_levels = st.slider("Levels to show", 1, 10, 3, key="ref_tree_levels")
+        with col_focus:
+            def member_label(member_id):
+                node, level = members_with_downline[member_id]
+                return f"{node['name']} (Level {level} • {downline_size[member_id]} below)"
+            # The browser sends back the label, so members whose labels repeat also show their ID
+            label_counts = Counter(member_label(member_id) for member_id in members_with_downline)
+            def focus_label(member_id):
+                if member_id == 0:
+                    return "Your whole network"
+                label = member_label(member_id)
+                return f"{label} • #{member_id}" if label_counts[label] > 1 else label
+            focus = st.selectbox("Focus on member", [0] + list(members_with_downline.keys()),
+                                 format_func=focus_label, key="ref_tree_focus")
+
+        if focus not in members_with_downline:
+            root_name, root_label, root_nodes = client['name'], "(You) • Pioneer Leader", tree_data
+        else:
+            focused = members_with_downline[focus][0]
+            root_name, root_label, root_nodes = focused['name'], f"• {downline_size[focused['id']]} in downline", focused['children']
+
+        level_counts = []
+        level_nodes = root_nodes
+        while level_nodes:
+            level_counts.append(len(level_nodes))
+            level_nodes = [child for node in level_nodes for child in node['children']]
+
+        def tree_html(nodes, level=1):
+            parts = []
+            for node in nodes:
+                badge = ("👑 <span style='color:#fbbf24; font-weight:bold;'>Pioneer Leader</span>" if node['type'] == "Pioneer"
+                         else "👤 <span style='color:#94a3b8;'>Regular Member</span>")
+                glow = "text-shadow: 0 0 10px rgba(59,130,246,0.7);" if level == 1 else ""
+                label = f"<strong style='font-size:1.1rem; {glow}'>{html.escape(node['name'])}</strong> • {badge}"
+                below = downline_size[node['id']]
+                if not node['children']:
+                    parts.append(f"<div class='ref-node ref-leaf'>{label}</div>")
+                elif level < max_levels:
+                    opened = " open" if level < TREE_OPEN_LEVELS else ""
+                    parts.append(f"<details class='ref-node'{opened}><summary>{label} <span class='ref-count'>{below} below</span></summary>"
+                             f"<div class='ref-children'>{tree_html(node['children'], level + 1)}</div></details>")
+                else:
+                    parts.append(f"<div class='ref-node ref-leaf'>{label} <span class='ref-count'>+{below} more below • focus to expand</span></div>")
+            return "".join(parts)
+
+        level_pills = "".join(f"<span class='ref-level'>Level {i}: {n:,}</span>" for i, n in enumerate(level_counts, 1))
+        st.markdown(
+            "<style>"
+        ".ref-tree {background: linear-gradient(135deg, rgba(15, 25, 50, 0.9), rgba(30, 41, 79, 0.8)); backdrop-filter: blur(16px);"
+        " border-radius: 20px; padding: 32px; border: 2px solid rgba(59, 130, 246, 0.4);"
+        " box-shadow: 0 10px 30px rgba(0,0,0,0.3), 0 0 20px rgba(59,130,246,0.2); font-size: 17px; line-height: 2.2; margin: 20px 0;}"
+        ".ref-tree summary {cursor: pointer;}"
+        ".ref-children {margin-left: 14px; padding-left: 18px; border-left: 2px solid rgba(59,130,246,0.35);}"
+        ".ref-leaf {padding-left: 18px;}"
+        ".ref-count {color:#94a3b8; font-size:0.85rem; margin-left:6px;}"
+        ".ref-level {display:inline-block; margin:0 6px 8px 0; padding:2px 14px; border-radius:20px; background:rgba(59,130,246,0.2); font-size:0.9rem;}"
+        "</style>"
+        f"<div class='ref-tree'>"
+        f"<div style='text-align:center; margin-bottom:20px;'><div style='display:inline-block; padding:15px 40px; background:{accent}; border-radius:50px; color:white; font-size:1.4rem; font-weight:bold; box-shadow:0 0 20px rgba(59,130,246,0.6);'>"
+        f"🌟 {html.escape(root_name)} {root_label}</div></div>"
+        f"<div style='text-align:center;'>{level_pills}</div>"
+        f"{tree_html(root_nodes)}"
+        "</div>",
+            unsafe_allow_html=True)
+
+        st.caption("👑 Pioneer Leader • 👤 Regular Member • Deeper levels = stronger growth")
+
+    # === BONUS HISTORY (keep the amazing style from before) ===
+    st.markdown("---")
+    st.subheader("🎁 Referral Bonus History")
+    st.markdown("#### Your earnings from downline profits – pure passive income!")
+
+    # Bonus rows for you and everyone below you (depth 0 is your own row in the closure)
+    bonus_history = pd.read_sql("""
+            SELECT p.date, p.referral_bonus, c.name AS from_client
+            FROM referral_closure rc
+            JOIN profits p ON p.client_id = rc.descendant_id
+            JOIN clients c ON c.id = p.client_id
+            WHERE rc.ancestor_id = ? AND p.referral_bonus > 0
+            ORDER BY p.date DESC
+        """, conn, params=(client_id,))
+
+    if bonus_history.empty:
+        st.info("🌟 Referral bonuses will appear here once your downline starts generating profits.\n\nThe more active your network, the bigger your passive earnings!")
+    else:
+        total_bonus = bonus_history['referral_bonus'].sum()
+        st.markdown(f"""
+        <div style="text-align:center; margin:30px 0;">
+            <div style="display:inline-block; padding:20px 60px; background:linear-gradient(135deg, #1e3a8a, #3b82f6); border-radius:30px; color:white; font-size:2rem; font-weight:bold; box-shadow:0 0 30px rgba(59,130,246,0.8);">
+                Total Referral Earnings: ${total_bonus:,.2f} 💎
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+        st.markdown("""
+        <div style="
+            background: linear-gradient(135deg, rgba(15, 25, 50, 0.9), rgba(30, 41, 79, 0.8));
+            backdrop-filter: blur(16px);
+            border-radius: 20px;
+            padding: 20px;
+            border: 2px solid rgba(251, 191, 36, 0.4);
+            box-shadow: 0 10px 30px rgba(0,0,0,0.3), 0 0 25px rgba(251,191,36,0.2);
+        ">
+        """, unsafe_allow_html=True)
+
+        for _, row in bonus_history.iterrows():
+            date_str = pd.to_datetime(row['date']).strftime('%b %d, %Y')
+            bonus_str = f"${row['referral_bonus']:,.2f}"
+            st.markdown(f"""
+            <div style="
+                display: flex;
+                justify-content: space-between;
+                align-items: center;
+                padding: 18px 24px;
+                margin: 12px 0;
+                background: rgba(59, 130, 246, 0.15);
+                border-radius: 16px;
+                border-left: 6px solid #fbbf24;
+                box-shadow: 0 4px 15px rgba(251,191,36,0.2);
+            ">
+                <div style="flex: 1;">
+                    <div style="font-size:1.2rem; font-weight:bold; color:#fbbf24;">🏆 Bonus Earned</div>
+                    <div style="color:#e2e8f0; margin-top:8px;">From: <strong>{row['from_client']}</strong></div>
+                </div>
+                <div style="text-align:right;">
+                    <div style="font-size:1.8rem; font-weight:bold; color:#fbbf24; text-shadow: 0 0 15px rgba(251,191,36,0.6);">
+                        +{bonus_str}
+                    </div>
+                    <div style="color:#94a3b8; font-size:0.9rem; margin-top:4px;">{date_str}</div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+
+        st.markdown("</div>", unsafe_allow_html=True)
+
+        st.caption("💡 Every profit from your downline = automatic bonus. Build deeper, earn forever!")
+
+    st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,122 @@
+# ------------------------- SUPER ULTIMATE NOTIFICATIONS (FULLY FIXED & RICH) -------------------------
+import time
+
+import pandas as pd
+import streamlit as st
+
+from kmfx import conversations, table_versions
+from kmfx import writer as db_writer
+from kmfx.db import get_connection
+from app_pages.common import card_row, hand_to_card, live_updates, read_row, rerun_card, subscribe_events
+
+
+FEED_POLL_SECONDS = 10
+
+
+def render(ctx):
+    conn = ctx.conn
+    st.markdown("<div class='content-card'>", unsafe_allow_html=True)
+
+    if st.session_state.is_owner or st.session_state.is_admin:
+        st.info("📢 This page is for client personal notifications only.")
+        st.write("You send notifications through actions like License Generator, Withdrawals, etc.")
+        st.stop()
+
+    st.header("🔔 Notifications")
+    st.markdown("#### Important updates and alerts for your account")
+
+    client_id = st.session_state.client_id
+
+    # === LIVE UPDATES: EVENTS FROM THE BUS (kmfx/events.py), PLUS A PRIMARY-KEY VERSION CHECK EVERY FEED_POLL_SECONDS ===
+    # The version check also catches writes made by processes that do not share this one's events.
+    # The notifications counter only moves on new rows, so Mark as Read keeps its card-only rerun.
+    def feed_version(client_id):
+        db = get_connection()
+        return (table_versions.row(db, "notifications", client_id), table_versions.row(db, "conversations", client_id))
+
+    def feed_changed():
+        if time.time() - st.session_state.get("notif_feed_checked", 0) < FEED_POLL_SECONDS:
+            return False
+        st.session_state.notif_feed_checked = time.time()
+        return feed_version(client_id) != st.session_state.notif_feed_version
+
+    # Both taken before reading, so anything written from here on is picked up
+    notif_events = subscribe_events("license_generated", "withdrawal_approved", "withdrawal_rejected", "withdrawal_paid", "message_sent",
+                                    where=lambda event: event["kind"] != "message_sent" or event["data"].get("from_admin") is not None)
+    st.session_state.notif_feed_version = feed_version(client_id)
+    st.session_state.notif_feed_checked = time.time()
+
+    unread_replies = conversations.thread(conn, client_id)['unread_client']
+    if unread_replies > 0:
+        st.info(f"✉️ You have {unread_replies} unread message(s) from support. Open 💬 Messages to read them.")
+
+    # Fetch notifications
+    notifications = pd.read_sql(f"""
+            SELECT id, title, message, category, date, read
+            FROM notifications
+            WHERE client_id = {client_id}
+            ORDER BY read ASC, date DESC
+        """, conn)
+
+    unread_count = notifications[notifications['read'] == 0].shape[0]
+
+    if unread_count > 0:
+        st.success(f"🟢 You have {unread_count} unread notification(s)")
+
+        if st.button("✅ Mark All as Read", type="primary", use_container_width=True):
+            try:
+                db_writer.execute("UPDATE notifications SET read = 1 WHERE client_id = ? AND read = 0", (client_id,))
+                st.success("All notifications marked as read!")
+                st.rerun()
+            except Exception as e:
+                st.error(f"Error marking all as read: {e}")
+
+    if notifications.empty:
+        st.info("No notifications yet.\n\n"
+            "You will be notified here for:\n"
+            "• New EA licenses\n"
+            "• Withdrawal status changes\n"
+            "• Important announcements\n"
+            "• Messages from support")
+    else:
+        # === ONE FRAGMENT PER NOTIFICATION: MARK AS READ RERUNS ONLY ITS OWN CARD ===
+        @st.fragment
+        def notification_card(noti):
+            noti = card_row(f"noti_{noti['id']}", noti, lambda: read_row(
+                "SELECT id, title, message, category, date, read FROM notifications WHERE id = ?", (noti['id'],)))
+            if noti is None:
+                return
+
+            # Category icons
+            icon = {
+                'License': '🔑',
+                'Withdrawal': '💳',
+                'General': '📢',
+                'Message': '✉️',
+                'Profit': '💰',
+                'System': '⚙️'
+            }.get(noti['category'], '🔔')
+
+            status_badge = "🟢 NEW" if noti['read'] == 0 else "✅ Read"
+
+            with st.expander(f"{status_badge} {icon} {noti['title']} • {noti['date']} • {noti['category']}", expanded=(noti['read'] == 0)):
+                st.markdown(noti['message'])
+
+                if noti['read'] == 0:
+                    col1, col2 = st.columns([1, 4])
+                    with col1:
+                        if st.button("Mark as Read", key=f"read_single_{noti['id']}"):
+                            try:
+                                db_writer.execute("UPDATE notifications SET read = 1 WHERE id = ?", (noti['id'],))
+                                st.success("Marked as read!")
+                                rerun_card()
+                            except Exception as e:
+                                st.error(f"Error: {e}")
+
+        for noti in notifications.to_dict("records"):
+            hand_to_card(f"noti_{noti['id']}")
+            notification_card(noti)
+
+    live_updates(notif_events, "🔄 Live: new notifications and messages appear as they arrive", changed=feed_changed)
+
+    st.markdown("</div>", unsafe_allow_html=True)
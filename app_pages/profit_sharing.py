@@ -0,0 +1,239 @@
+# ------------------------- SUPER ULTIMATE PROFIT SHARING & EARNINGS (FINAL FIXED - REFERRAL BONUS GUARANTEED WORKING) -------------------------
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from kmfx import events, profit_engine, profit_import, referrals
+from kmfx import writer as db_writer
+from app_pages.common import add_log, live_updates, load_clients, refresh_current_client, subscribe_events
+
+
+def render(ctx):
+    conn = ctx.conn
+    st.markdown("<div class='content-card'>", unsafe_allow_html=True)
+
+    if st.session_state.is_owner or st.session_state.is_admin:
+        # ====================== OWNER / ADMIN VIEW ======================
+        st.header("💰 Profit Sharing Management")
+        df_clients = load_clients()
+
+        if df_clients.empty:
+            st.info("No clients yet. Add them in Client Management first.")
+        else:
+            client_options = {row['name']: row['id'] for _, row in df_clients.iterrows()}
+            selected_name = st.selectbox(
+                "Select Client",
+                options=list(client_options.keys()),
+                format_func=lambda x: f"{x} ({df_clients[df_clients['name']==x]['type'].iloc[0]})"
+            )
+            client_id = client_options[selected_name]
+
+            # Fresh client data
+            client = pd.read_sql(f"SELECT * FROM clients WHERE id = {client_id}", conn).iloc[0].to_dict()
+
+            st.success(f"**Selected:** {client['name']} • {client['type']} • "
+                   f"Equity: ${client['current_equity']:,.2f} • "
+                   f"Withdrawable: ${client['withdrawable_balance']:,.2f}")
+
+            # Profit input
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                profit = st.number_input("Profit / Loss Amount ($)", value=0.0, step=100.0, format="%.2f")
+            with col2:
+                rec_date = st.date_input("Record Date", value=datetime.date.today())
+
+            if st.button("📈 RECORD PROFIT / LOSS", type="primary", use_container_width=True):
+                if profit == 0:
+                    st.warning("Enter a non-zero amount.")
+                else:
+                    try:
+                        # === SHARES & REFERRAL BONUSES (kmfx.profit_engine) ===
+                        upline = referrals.upline(conn, client_id, levels=profit_engine.BONUS_LEVELS)
+                        upline_map = profit_engine.build_upline_map(pd.DataFrame(
+                            [(client_id, depth, pioneer_id, pioneer_type) for depth, pioneer_id, _, pioneer_type in upline],
+                            columns=["descendant_id", "depth", "ancestor_id", "ancestor_type"]))
+                        shares, bonus_rows = profit_engine.split_profits([client_id], [profit], [client['type']], upline_map)
+
+                        client_share = float(shares['client_share'].iloc[0])
+                        referral_total = float(shares['referral_bonus'].iloc[0])
+                        owner_share = float(shares['owner_share'].iloc[0])
+                        bonuses = list(zip(bonus_rows['pioneer_id'].tolist(), bonus_rows['bonus'].tolist()))  # Written with the profit below
+
+                        if profit > 0 and client['type'].strip() == "Regular":
+                            st.info("🔍 Starting referral bonus trace...")
+                            upline_names = {pioneer_id: name for _, pioneer_id, name, _ in upline}
+                            for level, (pioneer_id, bonus) in enumerate(bonuses, 1):
+                                st.success(f"✅ Level {level} Bonus: +${bonus:.2f} → {upline_names[pioneer_id]} (Pioneer)")
+
+                            stopped_at = len(bonuses) + 1
+                            if stopped_at > len(upline):
+                                if stopped_at <= profit_engine.BONUS_LEVELS:
+                                    st.info(f"Level {stopped_at}: Reached top of chain (no further upline)")
+                            else:
+                                _, _, pioneer_name, pioneer_type = upline[stopped_at - 1]
+                                st.info(f"Level {stopped_at}: Upline {pioneer_name} is {pioneer_type} → not Pioneer, stopping.")
+
+                        def _record_profit(cur):
+                            for pioneer_id, bonus in bonuses:
+                                # Separate bonus record, credited to the Pioneer's withdrawable balance
+                                cur.execute("""INSERT INTO profits
+                                                   (client_id, profit, date, referral_bonus, client_share, your_share)
+                                                   VALUES (?, ?, ?, ?, ?, ?)""",
+                                            (pioneer_id, 0.0, rec_date.isoformat(), bonus, 0.0, 0.0))
+                                cur.execute("""UPDATE clients 
+                                                   SET withdrawable_balance = withdrawable_balance + ?
+                                                   WHERE id = ?""",
+                                            (bonus, pioneer_id))
+
+                            # Main profit record for the client
+                            cur.execute("""INSERT INTO profits
+                                               (client_id, profit, date, client_share, your_share)
+                                               VALUES (?, ?, ?, ?, ?)""",
+                                        (client_id, profit, rec_date.isoformat(), client_share, owner_share))
+
+                            # Update client balances
+                            cur.execute("""UPDATE clients
+                                               SET current_equity = current_equity + ?,
+                                                   withdrawable_balance = withdrawable_balance + ?
+                                               WHERE id = ?""",
+                                        (profit, client_share, client_id))
+
+                        db_writer.write(_record_profit)  # Bonuses, profit and balances in one commit
+                        events.publish("profit_recorded", client_id, profit=float(profit), client_share=client_share)
+                        for pioneer_id, bonus in bonuses:
+                            events.publish("profit_recorded", pioneer_id, referral_bonus=float(bonus))
+
+                        st.success(f"✅ Profit recorded successfully!\n"
+                               f"Client earnings: +${client_share:.2f}\n"
+                               f"Referral bonuses distributed: ${referral_total:.2f}\n"
+                               f"Owner net: +${owner_share:.2f}")
+                        st.rerun()
+
+                    except Exception as e:
+                        st.error(f"Error recording profit: {e}")
+                        print(f"MAIN PROFIT ERROR: {e}")
+
+            # === PROFIT HISTORY ===
+            st.markdown("---")
+            st.subheader(f"Profit History - {client['name']}")
+            history = pd.read_sql(f"""
+                    SELECT date, profit, client_share, your_share, referral_bonus
+                    FROM profits
+                    WHERE client_id = {client_id}
+                    ORDER BY date DESC
+                """, conn)
+
+            if not history.empty:
+                history['date'] = pd.to_datetime(history['date']).dt.strftime('%b %d, %Y')
+                history['profit'] = history['profit'].apply(lambda x: f"${x:,.2f}")
+                history['client_share'] = history['client_share'].apply(lambda x: f"${x:,.2f}" if x else "-")
+                history['your_share'] = history['your_share'].apply(lambda x: f"${x:,.2f}" if x else "-")
+                history['referral_bonus'] = history['referral_bonus'].apply(lambda x: f"${x:,.2f}" if x else "-")
+                st.dataframe(history, use_container_width=True, hide_index=True)
+            else:
+                st.info("No profit records yet for this client.")
+
+            # === BULK IMPORT (MANY ACCOUNTS, ONE TRANSACTION) ===
+            st.markdown("---")
+            if "bulk_import_summary" in st.session_state:
+                done = st.session_state.pop("bulk_import_summary")
+                st.success(f"✅ Bulk import posted {done['rows']} row(s) for {done['clients']} client(s)\n"
+                       f"Total P/L: ${done['profit']:,.2f} • Client earnings: ${done['client_share']:,.2f} • "
+                       f"Referral bonuses: ${done['referral_bonus']:,.2f} ({done['bonus_rows']} bonus rows) • "
+                       f"Owner net: ${done['owner_share']:,.2f}")
+
+            with st.expander("📥 Bulk Import (CSV or paste)", expanded=False):
+                st.caption("One row per account: `client, profit, date`. Client is the name, account or client ID; "
+                       "date is optional (YYYY-MM-DD, defaults to today). A header row is optional.")
+                import_key = st.session_state.get("bulk_import_key", 0)  # Bumped after posting to clear the inputs
+                bulk_file = st.file_uploader("CSV file", type=["csv", "txt"], key=f"bulk_file_{import_key}")
+                bulk_text = st.text_area("...or paste rows", height=150, key=f"bulk_text_{import_key}",
+                                         placeholder="client,profit,date\nJuan Dela Cruz,1250.50,2025-01-31")
+                source = bulk_file.getvalue() if bulk_file else bulk_text
+
+                if source.strip():
+                    try:
+                        postings = profit_import.match(profit_import.read_rows(source), df_clients)
+                    except Exception as e:
+                        st.error(f"Could not read rows: {e}")
+                        postings = None
+
+                    if postings is not None and not postings.empty:
+                        valid_ids = postings.loc[postings['error'] == "", 'client_id'].unique()
+                        postings, bonuses = profit_import.price(postings, profit_import.load_uplines(conn, valid_ids))
+                        preview = profit_import.summarize(postings, bonuses)
+
+                        col1, col2, col3, col4 = st.columns(4)
+                        col1.metric("Rows Ready", preview['rows'])
+                        col2.metric("Total P/L", f"${preview['profit']:,.2f}")
+                        col3.metric("Referral Bonuses", f"${preview['referral_bonus']:,.2f}")
+                        col4.metric("Owner Net", f"${preview['owner_share']:,.2f}")
+                        if preview['skipped']:
+                            st.warning(f"⚠️ {preview['skipped']} row(s) have errors and will be skipped")
+
+                        st.dataframe(
+                            postings[['client', 'name', 'date', 'profit', 'client_share', 'referral_bonus', 'owner_share', 'error']]
+                            .rename(columns={'client': 'Input', 'name': 'Client', 'date': 'Date', 'profit': 'Profit/Loss',
+                                             'client_share': 'Client Share', 'referral_bonus': 'Referral Bonus',
+                                             'owner_share': 'Owner Share', 'error': 'Error'}),
+                            use_container_width=True, hide_index=True)
+
+                        if preview['rows'] and st.button(f"✅ POST {preview['rows']} ROW(S)", type="primary", use_container_width=True):
+                            try:
+                                summary = db_writer.write(profit_import.post_batch, postings, bonuses)  # All rows or none
+                                for touched in set(postings.loc[postings['error'] == "", 'client_id'].tolist()) | set(bonuses['pioneer_id'].tolist()):
+                                    events.publish("profit_recorded", touched, bulk=True)
+                                add_log("Bulk Profit Import", f"{summary['rows']} rows | {summary['clients']} clients | "
+                                                          f"P/L ${summary['profit']:,.2f} | Bonuses ${summary['referral_bonus']:,.2f}")
+                                st.session_state.bulk_import_summary = summary
+                                st.session_state.bulk_import_key = import_key + 1
+                                st.rerun()
+                            except Exception as e:
+                                st.error(f"Bulk import failed, nothing was posted: {e}")
+
+    else:
+        # ====================== CLIENT VIEW ======================
+        st.header("💰 My Profit & Earnings")
+        live_updates(subscribe_events("profit_recorded"))  # Before the reads below
+        refresh_current_client()
+        client = st.session_state.current_client
+        client_id = client['id']
+
+        col1, col2 = st.columns(2)
+        col1.metric("Current Equity", f"${client['current_equity']:,.2f}")
+        col2.metric("Withdrawable Earnings", f"${client['withdrawable_balance']:,.2f}")
+
+        history = pd.read_sql(f"""
+                SELECT date, profit, client_share, referral_bonus
+                FROM profits
+                WHERE client_id = {client_id}
+                ORDER BY date DESC
+            """, conn)
+
+        if not history.empty:
+            st.subheader("Earnings History")
+            history['date'] = pd.to_datetime(history['date']).dt.strftime('%b %d, %Y')
+            history['profit'] = history['profit'].apply(lambda x: f"${x:,.2f}")
+            history['client_share'] = history['client_share'].apply(lambda x: f"${x:,.2f}" if x else "-")
+            history['referral_bonus'] = history['referral_bonus'].apply(lambda x: f"${x:,.2f}" if x else "-")
+            history['total_earned'] = pd.to_numeric(history['client_share'].str.replace(r'[$,]', '', regex=True), errors='coerce').fillna(0) + \
+                                      pd.to_numeric(history['referral_bonus'].str.replace(r'[$,]', '', regex=True), errors='coerce').fillna(0)
+            history['total_earned'] = history['total_earned'].apply(lambda x: f"${x:,.2f}")
+
+            display_hist = history[['date', 'profit', 'client_share', 'referral_bonus', 'total_earned']]
+            display_hist.rename(columns={
+                'date': 'Date',
+                'profit': 'Recorded Profit',
+                'client_share': 'Your Share',
+                'referral_bonus': 'Referral Bonus',
+                'total_earned': 'Total Earned'
+            }, inplace=True)
+            st.dataframe(display_hist, use_container_width=True, hide_index=True)
+
+            total_earned = history['total_earned'].str.replace(r'[$,]', '', regex=True).astype(float).sum()
+            st.success(f"🌟 Lifetime Earnings: ${total_earned:,.2f}")
+        else:
+            st.info("No earnings recorded yet. Your journey starts with the first profit!")
+
+    st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,169 @@
+# ------------------------- SUPER ULTIMATE REPORTS & EXPORT (OWNER ONLY) -------------------------
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from kmfx import audit
+from app_pages.common import (load_clients, load_profit_report, load_profits_summary, load_withdrawal_report,
+                              load_withdrawals, show_staleness)
+
+
+def render(ctx):
+    conn = ctx.conn
+    if not st.session_state.is_owner:
+        st.markdown("<div class='content-card'>", unsafe_allow_html=True)
+        st.error("🚫 Access Denied")
+        st.write("Reports & Export is only available to Owner.")
+        st.markdown("</div>", unsafe_allow_html=True)
+    else:
+        st.markdown("<div class='content-card'>", unsafe_allow_html=True)
+        st.header("📈 Reports & Export")
+        st.markdown("#### Comprehensive data reports and CSV exports")
+
+        # Load all data (last good frames while newer ones load in the background)
+        df_clients = load_clients(stale_ok=True)
+        df_profits = load_profits_summary(stale_ok=True)
+        df_withdrawals = load_withdrawals(stale_ok=True)
+        show_staleness("clients", "profits_summary", "withdrawals")
+
+        tab1, tab2, tab3, tab4 = st.tabs(["💰 Profit Reports", "👥 Client Summary", "💳 Withdrawals Report", "📜 Full Audit Logs"])
+
+        with tab1:
+            st.subheader("Profit & Revenue Reports")
+
+            if df_profits.empty:
+                st.info("No profit records yet. Reports will populate after recording profits.")
+            else:
+                # Full profits with client names
+                profits_full = load_profit_report(stale_ok=True)
+                show_staleness("profit_report")
+
+                profits_full['date'] = pd.to_datetime(profits_full['date']).dt.strftime('%b %d, %Y')
+
+                # Format currency
+                for col in ['profit', 'client_share', 'your_share', 'referral_bonus']:
+                    profits_full[col] = profits_full[col].apply(lambda x: f"${x:,.2f}" if x else "$0.00")
+
+                st.dataframe(profits_full, use_container_width=True, hide_index=True)
+
+                # Totals (sums of the monthly rollup rows)
+                total_profit = df_profits['profit'].sum()
+                total_client_share = df_profits['client_share'].sum()
+                total_owner_share = df_profits['your_share'].sum()
+                total_referral = df_profits['referral_bonus'].sum()
+
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Total Recorded Profit", f"${total_profit:,.2f}")
+                col2.metric("Client Shares Paid", f"${total_client_share:,.2f}")
+                col3.metric("Your Revenue", f"${total_owner_share:,.2f}")
+                col4.metric("Referral Bonuses", f"${total_referral:,.2f}")
+
+                # Export
+                csv_profits = profits_full.to_csv(index=False).encode()
+                st.download_button(
+                    "📥 Export Profit Report CSV",
+                    csv_profits,
+                    "KMFX_Profit_Report.csv",
+                    "text/csv",
+                    use_container_width=True
+                )
+
+        with tab2:
+            st.subheader("Client Summary Report")
+
+            if df_clients.empty:
+                st.info("No clients yet.")
+            else:
+                clients_report = df_clients.copy()
+                clients_report['current_equity'] = clients_report['current_equity'].apply(lambda x: f"${x:,.2f}")
+                clients_report['withdrawable_balance'] = clients_report['withdrawable_balance'].apply(lambda x: f"${x:,.2f}")
+                clients_report['start_balance'] = clients_report['start_balance'].apply(lambda x: f"${x:,.2f}")
+                clients_report['add_date'] = pd.to_datetime(clients_report['add_date']).dt.strftime('%b %d, %Y')
+                clients_report['expiry'] = pd.to_datetime(clients_report['expiry'], errors='coerce').dt.strftime('%b %d, %Y')
+
+                cols = ['name', 'type', 'mobile_number', 'address', 'accounts', 'referral_code',
+                        'current_equity', 'withdrawable_balance', 'start_balance', 'add_date', 'expiry']
+                clients_report = clients_report[[c for c in cols if c in clients_report.columns]]
+                clients_report.rename(columns={
+                    'name': 'Client Name',
+                    'type': 'Type',
+                    'mobile_number': 'Mobile',
+                    'address': 'Address',
+                    'accounts': 'Accounts',
+                    'referral_code': 'Referral Code',
+                    'current_equity': 'Current Equity',
+                    'withdrawable_balance': 'Withdrawable',
+                    'start_balance': 'Start Balance',
+                    'add_date': 'Joined',
+                    'expiry': 'Expiry'
+                }, inplace=True)
+
+                st.dataframe(clients_report, use_container_width=True, hide_index=True)
+
+                csv_clients = df_clients.to_csv(index=False).encode()
+                st.download_button(
+                    "📥 Export Client Summary CSV",
+                    csv_clients,
+                    "KMFX_Client_Summary.csv",
+                    "text/csv",
+                    use_container_width=True
+                )
+
+        with tab3:
+            st.subheader("Withdrawals Report")
+
+            if df_withdrawals.empty:
+                st.info("No withdrawal records yet.")
+            else:
+                wd_report = load_withdrawal_report(stale_ok=True)
+                show_staleness("withdrawal_report")
+
+                wd_report['date_requested'] = pd.to_datetime(wd_report['date_requested']).dt.strftime('%b %d, %Y')
+                if 'date_processed' in wd_report.columns:
+                    wd_report['date_processed'] = pd.to_datetime(wd_report['date_processed'], errors='coerce').dt.strftime('%b %d, %Y')
+
+                wd_report['amount'] = wd_report['amount'].apply(lambda x: f"${x:,.2f}")
+
+                st.dataframe(wd_report, use_container_width=True, hide_index=True)
+
+                csv_wd = wd_report.to_csv(index=False).encode()
+                st.download_button(
+                    "📥 Export Withdrawals Report CSV",
+                    csv_wd,
+                    "KMFX_Withdrawals_Report.csv",
+                    "text/csv",
+                    use_container_width=True
+                )
+
+        with tab4:
+            st.subheader("Full Audit Logs Export")
+            log_stats = audit.stats()
+            st.caption(f"Audit buffer: {log_stats['queue_depth']} waiting • "
+                   f"{log_stats['flushed']:,} written in {log_stats['flushes']:,} flushes • "
+                   f"last flush {log_stats['last_flush_ms']:.1f} ms (max {log_stats['max_flush_ms']:.1f} ms)"
+                       + (f" • {log_stats['failed']:,} dropped" if log_stats['failed'] else ""))
+            # Flushing costs a writer round-trip, so only on request (tab bodies run on every rerun)
+            if log_stats['queue_depth']:
+                st.button(f"💾 Write {log_stats['queue_depth']} waiting entr(ies) before exporting",
+                          key="flush_audit_buffer", on_click=audit.flush)
+            df_logs = pd.read_sql("SELECT * FROM logs ORDER BY timestamp DESC", conn)
+
+            if df_logs.empty:
+                st.info("No logs yet.")
+            else:
+                logs_display = df_logs.copy()
+                logs_display['timestamp'] = pd.to_datetime(logs_display['timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
+
+                st.dataframe(logs_display, use_container_width=True, hide_index=True)
+
+                csv_logs = df_logs.to_csv(index=False).encode()
+                st.download_button(
+                    "📥 Export Full Audit Logs CSV",
+                    csv_logs,
+                    f"KMFX_Audit_Logs_{datetime.date.today().isoformat()}.csv",
+                    "text/csv",
+                    use_container_width=True
+                )
+
+        st.markdown("</div>", unsafe_allow_html=True)
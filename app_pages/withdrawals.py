@@ -0,0 +1,240 @@
+# ------------------------- SUPER ULTIMATE WITHDRAWALS MANAGEMENT (WITH CLEAR 1-3 DAYS NOTE) -------------------------
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from kmfx import events
+from kmfx import writer as db_writer
+from app_pages.common import (add_log, card_row, hand_to_card, live_updates, notify_withdrawal_client,
+                              read_row, refresh_current_client, rerun_card, subscribe_events)
+
+
+def render(ctx):
+    conn = ctx.conn
+    st.markdown("<div class='content-card'>", unsafe_allow_html=True)
+
+    # ====================== ADMIN / OWNER VIEW ======================
+    if st.session_state.is_owner or st.session_state.is_admin:
+        st.header("💳 Withdrawal Management")
+        st.markdown("#### Approve requests and mark as paid when processed")
+
+        # New requests show up live; this page's own actions rerun only their card
+        live_updates(subscribe_events("withdrawal_requested"))
+
+        pending = pd.read_sql("""
+                SELECT w.id, w.client_id, w.amount, w.method, w.details, w.date_requested, w.status,
+                       c.name, c.withdrawable_balance, c.mobile_number, c.address
+                FROM withdrawals w
+                JOIN clients c ON w.client_id = c.id
+                WHERE w.status = 'Pending'
+                ORDER BY w.date_requested DESC
+            """, conn)
+
+        approved_pending_payout = pd.read_sql("""
+                SELECT w.id, w.client_id, w.amount, w.method, w.details, w.date_requested, w.date_processed, w.status,
+                       c.name, c.withdrawable_balance
+                FROM withdrawals w
+                JOIN clients c ON w.client_id = c.id
+                WHERE w.status = 'Approved'
+                ORDER BY w.date_processed DESC
+            """, conn)
+
+        # === ONE FRAGMENT PER REQUEST: APPROVE / REJECT / PAID RERUN ONLY THAT CARD ===
+        # (the counts above catch up on the next full rerun)
+        @st.fragment
+        def pending_card(req):
+            req = card_row(f"wd_pending_{req['id']}", req, lambda: read_row(
+                """SELECT w.id, w.client_id, w.amount, w.method, w.details, w.date_requested, w.status,
+                          c.name, c.withdrawable_balance, c.mobile_number, c.address
+                   FROM withdrawals w
+                   JOIN clients c ON w.client_id = c.id
+                   WHERE w.id = ?""", (req['id'],)))
+            if req is None:
+                return
+            if req['status'] != 'Pending':
+                st.caption(f"${req['amount']:,.2f} • {req['name']} • now **{req['status']}**")
+                return
+
+            with st.expander(f"⏳ ${req['amount']:,.2f} • {req['name']} • Requested: {req['date_requested']}", expanded=True):
+                st.write(f"**Client:** {req['name']}")
+                st.write(f"**Mobile:** {req['mobile_number'] or 'Not set'}")
+                st.write(f"**Address:** {req['address'] or 'Not set'}")
+                st.write(f"**Current Withdrawable:** ${req['withdrawable_balance']:,.2f}")
+                st.write(f"**Details:**\n{req['details']}")
+
+                col_approve, col_reject = st.columns(2)
+                with col_approve:
+                    if st.button("✅ APPROVE", key=f"approve_{req['id']}", type="primary"):
+                        try:
+                            processed_by = "Owner" if st.session_state.is_owner else "Admin"
+
+                            def _approve(cur):
+                                cur.execute("""UPDATE withdrawals
+                                                   SET status = 'Approved',
+                                                       date_processed = ?,
+                                                       processed_by = ?
+                                                   WHERE id = ?""",
+                                            (datetime.date.today().isoformat(),
+                                             processed_by,
+                                             req['id']))
+
+                                # === NOTIFICATION WITH 1-3 DAYS NOTE ===
+                                notify_withdrawal_client(cur, req['id'], '💳 Withdrawal Approved!',
+                                                         f"Your withdrawal request of ${req['amount']:,.2f} has been **APPROVED**! 🎉\n\n"
+                                                     f"**Payment will be sent within 1-3 working days** via {req['method']}.\n\n"
+                                                     f"Please check your account after that period.\n\n"
+                                                     f"Thank you for trading with KMFX Elite!")
+
+                            db_writer.write(_approve)
+                            events.publish("withdrawal_approved", req['client_id'], withdrawal_id=req['id'])
+
+                            add_log("Withdrawal Approved", f"${req['amount']:,.2f} for {req['name']}")
+                            st.success("Approved! Client notified with processing time.")
+                            rerun_card()
+                        except Exception as e:
+                            st.error(f"Error: {e}")
+
+                with col_reject:
+                    reject_reason = st.text_input("Reason for rejection", key=f"reason_{req['id']}")
+                    if st.button("❌ REJECT", key=f"reject_{req['id']}", type="secondary"):
+                        if not reject_reason.strip():
+                            st.error("Reason required.")
+                        else:
+                            try:
+                                def _reject(cur):
+                                    cur.execute("""UPDATE withdrawals SET status = 'Rejected', notes = ? WHERE id = ?""",
+                                                (reject_reason, req['id']))
+                                    notify_withdrawal_client(cur, req['id'], 'Withdrawal Rejected',
+                                                             f"Your withdrawal was rejected.\nReason: {reject_reason}")
+
+                                db_writer.write(_reject)
+                                events.publish("withdrawal_rejected", req['client_id'], withdrawal_id=req['id'])
+                                add_log("Withdrawal Rejected", f"${req['amount']:,.2f} | {reject_reason}")
+                                st.error("Rejected.")
+                                rerun_card()
+                            except Exception as e:
+                                st.error(f"Error: {e}")
+
+        @st.fragment
+        def payout_card(req):
+            req = card_row(f"wd_payout_{req['id']}", req, lambda: read_row(
+                """SELECT w.id, w.client_id, w.amount, w.method, w.details, w.date_requested, w.date_processed, w.status,
+                          c.name, c.withdrawable_balance
+                   FROM withdrawals w
+                   JOIN clients c ON w.client_id = c.id
+                   WHERE w.id = ?""", (req['id'],)))
+            if req is None:
+                return
+            if req['status'] != 'Approved':
+                st.caption(f"${req['amount']:,.2f} • {req['name']} • now **{req['status']}**")
+                return
+
+            with st.expander(f"👍 ${req['amount']:,.2f} • {req['name']} • Approved: {req['date_processed']}", expanded=False):
+                st.write(f"**Client:** {req['name']}")
+                st.write(f"**Current Withdrawable:** ${req['withdrawable_balance']:,.2f}")
+                st.write(f"**Details:** {req['details']}")
+                st.info("⏳ Client has been informed: Payment within 1-3 working days")
+                if st.button("💰 MARK AS PAID (Deduct Balance)", key=f"paid_{req['id']}", type="secondary", use_container_width=True):
+                    try:
+                        def _mark_paid(cur):
+                            cur.execute("""UPDATE clients
+                                               SET withdrawable_balance = withdrawable_balance - ?
+                                               WHERE id = (SELECT client_id FROM withdrawals WHERE id = ?)""",
+                                        (req['amount'], req['id']))
+                            cur.execute("UPDATE withdrawals SET status = 'Paid' WHERE id = ?", (req['id'],))
+
+                            # Final paid notification
+                            notify_withdrawal_client(cur, req['id'], '✅ Withdrawal Paid!',
+                                                     f"Great news! Your withdrawal of ${req['amount']:,.2f} has been **PAID**! 💸\n\n"
+                                                 f"Check your {req['method']} account now.\n\n"
+                                                 f"Thank you for being part of KMFX Elite!")
+
+                        db_writer.write(_mark_paid)
+                        events.publish("withdrawal_paid", req['client_id'], withdrawal_id=req['id'])
+
+                        add_log("Withdrawal Paid", f"${req['amount']:,.2f} for {req['name']}")
+                        st.success("Marked as PAID! Balance deducted.")
+                        rerun_card()
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+
+        if pending.empty and approved_pending_payout.empty:
+            st.success("✅ No pending withdrawal actions at the moment.")
+        else:
+            if not pending.empty:
+                st.warning(f"⏳ {len(pending)} pending approval request(s)")
+                for req in pending.to_dict("records"):
+                    hand_to_card(f"wd_pending_{req['id']}")
+                    pending_card(req)
+
+            if not approved_pending_payout.empty:
+                st.markdown("---")
+                st.subheader("✅ Approved - Awaiting Payout (1-3 Working Days)")
+                for req in approved_pending_payout.to_dict("records"):
+                    hand_to_card(f"wd_payout_{req['id']}")
+                    payout_card(req)
+
+    # ====================== CLIENT VIEW ======================
+    else:
+        st.header("💳 My Withdrawals")
+        st.markdown("#### Request payout of your earnings")
+
+        live_updates(subscribe_events("withdrawal_approved", "withdrawal_rejected", "withdrawal_paid"))  # Before the reads below
+        refresh_current_client()
+        client = st.session_state.current_client
+        withdrawable = client['withdrawable_balance']
+        st.metric("Available for Withdrawal", f"${withdrawable:,.2f}")
+
+        if withdrawable < 10:
+            st.warning("Minimum withdrawal amount is $10.")
+        else:
+            with st.form("withdrawal_request"):
+                amount = st.number_input("Amount ($)", min_value=10.0, max_value=float(withdrawable), step=10.0)
+                method = st.selectbox("Payment Method", ["GCash", "Bank Transfer", "USDT", "PayMaya", "PayPal", "Other"])
+                details = st.text_area("Payment Details (e.g. GCash number, Bank account) *")
+
+                if st.form_submit_button("📤 SUBMIT REQUEST", type="primary"):
+                    if not details.strip():
+                        st.error("Payment details are required!")
+                    else:
+                        try:
+                            db_writer.execute("""INSERT INTO withdrawals
+                                                     (client_id, amount, method, details, date_requested, status)
+                                                     VALUES (?, ?, ?, ?, ?, 'Pending')""",
+                                              (client['id'], amount, method, details, datetime.date.today().isoformat()))
+                            events.publish("withdrawal_requested", client['id'], amount=float(amount))
+
+                            # === CLEAR SUCCESS MESSAGE WITH 1-3 DAYS NOTE ===
+                            st.success(f"✅ Withdrawal request for ${amount:,.2f} submitted successfully!\n\n"
+                                   f"**Status:** Pending Approval\n"
+                                   f"**Processing Time:** Once approved, payment will be sent within **1-3 working days**.\n\n"
+                                   f"You will receive a notification for every update.")
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Error: {e}")
+
+        # History
+        st.markdown("---")
+        st.subheader("Withdrawal History")
+        history = pd.read_sql(f"SELECT * FROM withdrawals WHERE client_id = {client['id']} ORDER BY date_requested DESC", conn)
+        if history.empty:
+            st.info("No withdrawal history yet.")
+        else:
+            for _, row in history.iterrows():
+                if row['status'] == 'Paid':
+                    icon = "✅"
+                    extra = ""
+                elif row['status'] == 'Approved':
+                    icon = "👍"
+                    extra = " (Payment processing: 1-3 working days)"
+                elif row['status'] == 'Rejected':
+                    icon = "❌"
+                    extra = f" - Reason: {row['notes'] or 'Not specified'}"
+                else:
+                    icon = "⏳"
+                    extra = ""
+
+                st.markdown(f"{icon} **${row['amount']:,.2f}** • {row['method']} • {row['date_requested']} • Status: **{row['status']}**{extra}")
+
+    st.markdown("</div>", unsafe_allow_html=True)
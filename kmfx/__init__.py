@@ -0,0 +1 @@
+"""Database and business logic shared by the KMFX Streamlit dashboard."""
@@ -0,0 +1,109 @@
+# ==================== KMFX AUDIT LOG ====================
+"""Buffered audit logger.
+
+log() only appends to an in-memory buffer, so no page waits on the database
+to record an audit line. A background thread writes the buffer with one
+executemany through the single writer once FLUSH_SIZE entries are waiting
+or FLUSH_INTERVAL seconds have passed, and whatever is left is flushed when
+the process exits.
+"""
+
+import atexit
+import datetime
+import os
+import threading
+import time
+
+from kmfx import writer as db_writer
+
+FLUSH_SIZE = int(os.getenv("KMFX_AUDIT_FLUSH_SIZE", "100"))          # entries
+FLUSH_INTERVAL = float(os.getenv("KMFX_AUDIT_FLUSH_INTERVAL", "2"))  # seconds
+
+INSERT_SQL = "INSERT INTO logs (timestamp, action, details, user_type, user_id) VALUES (?, ?, ?, ?, ?)"
+
+class AuditLogger:
+    def __init__(self, flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One flush at a time keeps entries in order
+        self._wake = threading.Event()
+        self.flushes = 0
+        self.flushed = 0
+        self.failed = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._thread = threading.Thread(target=self._run, name="kmfx-audit-log", daemon=True)
+        self._thread.start()
+
+    def log(self, action, details="", user_type="System", user_id=None):
+        entry = (datetime.datetime.now().isoformat(), action, details, user_type, user_id)
+        with self._lock:
+            self._buffer.append(entry)
+            full = len(self._buffer) >= self.flush_size
+        if full:
+            self._wake.set()
+
+    def queue_depth(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue_depth(),
+            "flushes": self.flushes,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": self.max_flush_ms,
+        }
+
+    def flush(self):
+        """Write every buffered entry now and wait for the commit. Returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            started = time.perf_counter()
+            try:
+                db_writer.executemany(INSERT_SQL, rows)
+            except Exception as e:
+                # Audit lines are best effort; never let them break the page that logged them
+                self.failed += len(rows)
+                print(f"Audit log flush failed ({len(rows)} entries dropped): {e}")
+                return 0
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+            self.flushes += 1
+            self.flushed += len(rows)
+            return len(rows)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+# ------------------------- PROCESS-WIDE LOGGER -------------------------
+_logger = None
+_logger_lock = threading.Lock()
+
+def get_logger():
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            db_writer.get_writer()  # Start the writer first so its atexit stop runs after our final flush
+            _logger = AuditLogger()
+            atexit.register(_logger.flush)
+    return _logger
+
+def log(action, details="", user_type="System", user_id=None):
+    get_logger().log(action, details, user_type, user_id)
+
+def flush():
+    return get_logger().flush()
+
+def stats():
+    return get_logger().stats()
@@ -0,0 +1,136 @@
+# ==================== KMFX CONVERSATIONS ====================
+"""One summary row per client for the Messages Center inbox.
+
+conversations holds, for every client, the time of the latest message in
+their thread, the number of messages, the client messages support has not
+read (unread_admin) and the support replies the client has not read
+(unread_client). A message belongs to the thread of its from_client_id and
+of its to_client_id. Triggers on messages and clients keep the table
+current inside the transaction that changed them, so the inbox is one
+indexed, ordered read however many messages there are.
+
+Threads are read by keyset on messages.id: window() returns the newest page
+below an id ("load older") and newer() only what arrived after the last id a
+session has seen, so neither grows with the length of the thread.
+
+Rebuild the table from messages and clients:
+
+    python -m kmfx.conversations [path/to/db]
+"""
+
+import pandas as pd
+
+_UNREAD_ADMIN = "(CASE WHEN {row}.read = 0 AND {row}.from_client_id IS NOT NULL THEN 1 ELSE 0 END)"
+_UNREAD_CLIENT = "(CASE WHEN {row}.read = 0 AND {row}.from_client_id IS NULL THEN 1 ELSE 0 END)"
+_LAST_TS = "(SELECT MAX(timestamp) FROM messages WHERE from_client_id = {client} OR to_client_id = {client})"
+
+def _threads(row):
+    """SQL for the client ids whose thread a messages row is in (one or two of them)."""
+    return (f"SELECT {row}.from_client_id AS client_id WHERE {row}.from_client_id IS NOT NULL "
+            f"UNION SELECT {row}.to_client_id WHERE {row}.to_client_id IS NOT NULL")
+
+def _count(row, sign):
+    """Add (sign=+) or remove (sign=-) one messages row from its threads; + also moves last_ts forward."""
+    last_ts = (f", last_ts = NULLIF(MAX(COALESCE(last_ts, ''), COALESCE({row}.timestamp, '')), '')"
+               if sign == "+" else "")
+    return (f"UPDATE conversations SET total = total {sign} 1, "
+            f"unread_admin = unread_admin {sign} {_UNREAD_ADMIN.format(row=row)}, "
+            f"unread_client = unread_client {sign} {_UNREAD_CLIENT.format(row=row)}{last_ts} "
+            f"WHERE client_id IN ({_threads(row)});")
+
+def _retime(row):
+    return (f"UPDATE conversations SET last_ts = {_LAST_TS.format(client='conversations.client_id')} "
+            f"WHERE client_id IN ({_threads(row)});")
+
+CONVERSATION_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS conversations (
+        client_id INTEGER PRIMARY KEY,
+        last_ts TEXT,
+        total INTEGER NOT NULL DEFAULT 0,
+        unread_admin INTEGER NOT NULL DEFAULT 0,
+        unread_client INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID''',
+    # Inbox order: latest conversation first
+    "CREATE INDEX IF NOT EXISTS idx_conversations_last_ts ON conversations(last_ts)",
+    # Every client has a (possibly empty) conversation
+    "CREATE TRIGGER IF NOT EXISTS conversations_clients_insert AFTER INSERT ON clients "
+    "BEGIN INSERT OR IGNORE INTO conversations (client_id) VALUES (NEW.id); END",
+    "CREATE TRIGGER IF NOT EXISTS conversations_clients_delete AFTER DELETE ON clients "
+    "BEGIN DELETE FROM conversations WHERE client_id = OLD.id; END",
+    # Messages
+    f"CREATE TRIGGER IF NOT EXISTS conversations_messages_insert AFTER INSERT ON messages BEGIN {_count('NEW', '+')} END",
+    f"CREATE TRIGGER IF NOT EXISTS conversations_messages_delete AFTER DELETE ON messages "
+    f"BEGIN {_count('OLD', '-')} {_retime('OLD')} END",
+    f"CREATE TRIGGER IF NOT EXISTS conversations_messages_update AFTER UPDATE OF from_client_id, to_client_id, read ON messages "
+    f"BEGIN {_count('OLD', '-')} {_count('NEW', '+')} END",
+    f"CREATE TRIGGER IF NOT EXISTS conversations_messages_retime AFTER UPDATE OF from_client_id, to_client_id, timestamp ON messages "
+    f"BEGIN {_retime('OLD')} {_retime('NEW')} END",
+]
+
+# Keyset reads of one thread: WHERE from_client_id = ? / to_client_id = ? AND id < ? / id > ?
+THREAD_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_messages_from_id ON messages(from_client_id, id)",
+    "CREATE INDEX IF NOT EXISTS idx_messages_to_id ON messages(to_client_id, id)",
+]
+
+THREAD_PAGE = 50
+_THREAD_COLUMNS = "id, from_client_id, from_admin, message, timestamp"
+# Fixed dtypes, so pages of one thread concatenate cleanly even when a page has no client messages
+_THREAD_DTYPES = {"id": "int64", "from_client_id": "Int64", "from_admin": "object", "message": "object", "timestamp": "object"}
+
+# ------------------------- MAINTENANCE (RUN INSIDE A WRITE) -------------------------
+def rebuild(cur):
+    cur.execute("DELETE FROM conversations")
+    cur.execute(f"""INSERT INTO conversations (client_id, last_ts, total, unread_admin, unread_client)
+                    SELECT c.id, t.last_ts, COALESCE(t.total, 0), COALESCE(t.unread_admin, 0), COALESCE(t.unread_client, 0)
+                    FROM clients c
+                    LEFT JOIN (SELECT client_id, MAX(timestamp) AS last_ts, COUNT(*) AS total,
+                                      SUM({_UNREAD_ADMIN.format(row='m')}) AS unread_admin,
+                                      SUM({_UNREAD_CLIENT.format(row='m')}) AS unread_client
+                               FROM (SELECT from_client_id AS client_id, * FROM messages WHERE from_client_id IS NOT NULL
+                                     UNION ALL
+                                     SELECT to_client_id, * FROM messages
+                                     WHERE to_client_id IS NOT NULL AND to_client_id IS NOT from_client_id) m
+                               GROUP BY client_id) t ON t.client_id = c.id""")
+
+# ------------------------- READ -------------------------
+def inbox(db):
+    """id, name, total_msgs, unread (from the client) for every client, latest conversation first."""
+    return pd.read_sql("""SELECT c.id, c.name, cv.total AS total_msgs, cv.unread_admin AS unread
+                          FROM conversations cv
+                          JOIN clients c ON c.id = cv.client_id
+                          ORDER BY cv.last_ts DESC, c.name""", db)
+
+def thread(db, client_id):
+    """The summary row of one client's conversation as a dict (zeros if there is none)."""
+    row = db.execute("SELECT last_ts, total, unread_admin, unread_client FROM conversations WHERE client_id = ?",
+                     (client_id,)).fetchone()
+    return dict(zip(["last_ts", "total", "unread_admin", "unread_client"], row or (None, 0, 0, 0)))
+
+def window(db, client_id, before_id=None, limit=THREAD_PAGE):
+    """The newest ``limit`` messages of a thread with id below before_id (or at all), oldest first."""
+    before_id = before_id if before_id is not None else 2 ** 63 - 1
+    page = pd.read_sql(f"""SELECT * FROM (SELECT {_THREAD_COLUMNS} FROM messages
+                                         WHERE from_client_id = ? AND id < ? ORDER BY id DESC LIMIT ?)
+                           UNION
+                           SELECT * FROM (SELECT {_THREAD_COLUMNS} FROM messages
+                                          WHERE to_client_id = ? AND id < ? ORDER BY id DESC LIMIT ?)
+                           ORDER BY id DESC LIMIT ?""",
+                       db, params=(client_id, before_id, limit, client_id, before_id, limit, limit), dtype=_THREAD_DTYPES)
+    return page.iloc[::-1].reset_index(drop=True)
+
+def newer(db, client_id, after_id):
+    """Messages of a thread with id above after_id, oldest first."""
+    return pd.read_sql(f"""SELECT {_THREAD_COLUMNS} FROM messages WHERE from_client_id = ? AND id > ?
+                           UNION
+                           SELECT {_THREAD_COLUMNS} FROM messages WHERE to_client_id = ? AND id > ?
+                           ORDER BY id""",
+                       db, params=(client_id, after_id, client_id, after_id), dtype=_THREAD_DTYPES)
+
+if __name__ == "__main__":
+    import sys
+    from kmfx.db import run_write
+
+    db, _ = run_write(sys.argv[1] if len(sys.argv) > 1 else None, rebuild)
+    count = db.execute("SELECT COUNT(*) FROM conversations WHERE total > 0").fetchone()[0]
+    print(f"Rebuilt conversations: {count} with messages")
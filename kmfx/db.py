@@ -0,0 +1,85 @@
+# ==================== KMFX DATABASE CONNECTIONS ====================
+"""Per-thread SQLite connections running in WAL mode with a tunable PRAGMA profile.
+
+Streamlit executes each session's script on its own thread, so handing every
+thread its own connection keeps sessions from sharing cursor state. WAL lets
+those readers continue while another session is writing.
+"""
+
+import os
+import sqlite3
+import threading
+
+DB_PATH = os.getenv("KMFX_DB_PATH", "kmfx_ultimate.db")
+
+# === PRAGMA PROFILE (OVERRIDE ANY ENTRY WITH KMFX_SQLITE_<NAME>, e.g. KMFX_SQLITE_CACHE_SIZE) ===
+PRAGMA_PROFILE = {
+    "journal_mode": "WAL",     # Readers never wait for the writer
+    "synchronous": "FULL",     # fsync the WAL on every commit: balances and payouts survive power loss
+    "cache_size": -65536,      # Negative = KiB, so 64 MB page cache per connection
+    "mmap_size": 268435456,    # 256 MB memory-mapped reads
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,      # ms to wait on a lock before raising SQLITE_BUSY
+}
+for _name in PRAGMA_PROFILE:
+    _override = os.getenv(f"KMFX_SQLITE_{_name.upper()}")
+    if _override:
+        PRAGMA_PROFILE[_name] = _override
+
+MAX_IDLE_CONNECTIONS = 8
+
+_local = threading.local()
+_lock = threading.Lock()
+_owners = {}  # thread -> connection it is using
+_idle = []    # connections handed back by finished threads, reused before opening new ones
+
+def configure(**pragmas):
+    """Change the PRAGMA profile used for connections opened from now on."""
+    PRAGMA_PROFILE.update(pragmas)
+
+def connect(path=None):
+    """Open a new connection with the PRAGMA profile applied."""
+    conn = sqlite3.connect(path or DB_PATH, check_same_thread=False)
+    for name, value in PRAGMA_PROFILE.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+def run_write(path, op):
+    """Open a database, migrate it and run op(cur) in one transaction; returns (connection, op's result).
+
+    For the maintenance CLIs (``python -m kmfx.referrals`` and the like), which run outside the app's writer.
+    """
+    from kmfx.migrations import migrate  # Imported here: migrations imports the modules that call this
+
+    conn = connect(path)
+    migrate(conn)
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        result = op(cur)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return conn, result
+
+def _reclaim_finished_threads():
+    for thread in [t for t in _owners if not t.is_alive()]:
+        conn = _owners.pop(thread)
+        if conn.in_transaction:
+            conn.rollback()
+        if len(_idle) < MAX_IDLE_CONNECTIONS:
+            _idle.append(conn)
+        else:
+            conn.close()
+
+def get_connection():
+    """Return the calling thread's connection, reusing one from a finished thread if possible."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        with _lock:
+            _reclaim_finished_threads()
+            conn = _idle.pop() if _idle else connect()
+            _owners[threading.current_thread()] = conn
+        _local.conn = conn
+    return conn
@@ -0,0 +1,208 @@
+# ==================== KMFX EVENT BUS ====================
+"""In-process publish/subscribe for "something changed for this client".
+
+Write paths publish an event once their commit has returned:
+
+    events.publish("withdrawal_paid", client_id, withdrawal_id=7)
+
+Every event reaches the topic of its client ("client:7") and of the staff
+roles ("role:owner", "role:admin"). A session subscribes to its own topics
+when a page renders, narrowed to the kinds it shows and, through a
+where(event) predicate, to the events that change what it draws. A small
+fragment then asks the subscription, in memory, whether anything has
+arrived since. An idle session never touches the database, and the page
+reruns only when an event for it came in.
+
+Event kinds: profit_recorded, license_generated, withdrawal_requested,
+withdrawal_approved, withdrawal_rejected, withdrawal_paid, message_sent.
+
+Several server processes on one host share events through an append-only
+file. Set KMFX_EVENTS_FILE to the same path for each of them. Every
+process appends what it publishes and follows the lines the others
+append. Without it, events stay inside the process.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+EVENTS_FILE = os.getenv("KMFX_EVENTS_FILE")
+
+STAFF_ROLES = ("owner", "admin")
+HISTORY = 1024              # Events kept for subscriptions to catch up on
+RELAY_POLL_SECONDS = 0.5    # How often the file relay looks for other processes' events
+MAX_RELAY_BYTES = 1 << 20   # Rotate the shared file to <path>.1 beyond this size
+
+
+def topics(client_id=None, role=None):
+    """Topic names for a client and/or a staff role."""
+    found = set()
+    if client_id is not None:
+        found.add(f"client:{int(client_id)}")
+    if role is not None:
+        found.add(f"role:{role}")
+    return frozenset(found)
+
+
+class Subscription:
+    """Events for some topics (and kinds, and where(event), if given) published after the subscription was made."""
+
+    def __init__(self, bus, topics, kinds=None, where=None):
+        self.bus = bus
+        self.topics = frozenset(topics)
+        self.kinds = frozenset(kinds) if kinds else None
+        self.where = where
+        self.seq = bus.seq
+
+    def _since(self):
+        found, seq = self.bus.since(self.seq, self.topics, self.kinds)
+        if self.where is not None:
+            found = [event for event in found if event["kind"] == "missed" or self.where(event)]
+        return found, seq
+
+    def poll(self):
+        """Events that arrived since the last poll, oldest first."""
+        found, self.seq = self._since()
+        return found
+
+    def pending(self):
+        """Whether any event has arrived, without consuming it."""
+        found, seq = self._since()
+        if not found:
+            self.seq = seq  # Nothing for this subscription so far: skip those events next time
+        return bool(found)
+
+
+class EventBus:
+    def __init__(self, history=HISTORY):
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=history)  # (seq, topics, event)
+        self._seq = 0
+        self._relay = None
+
+    @property
+    def seq(self):
+        with self._lock:
+            return self._seq
+
+    def publish(self, kind, client_id=None, roles=STAFF_ROLES, **data):
+        event = {"kind": kind, "client_id": client_id, "roles": list(roles), "data": data, "time": time.time()}
+        self.deliver(event)
+        if self._relay is not None:
+            self._relay.send(event)
+        return event
+
+    def deliver(self, event):
+        """Hand an event to this process's subscribers (the relay calls this for other processes' events)."""
+        event_topics = topics(event["client_id"]) | {f"role:{role}" for role in event["roles"]}
+        with self._lock:
+            self._seq += 1
+            self._events.append((self._seq, event_topics, event))
+
+    def since(self, seq, topics, kinds=None):
+        """(matching events after seq, current seq); a gap older than the history counts as one event."""
+        with self._lock:
+            current = self._seq
+            if seq >= current:
+                return [], current
+            if self._events[0][0] > seq + 1:
+                return [{"kind": "missed", "client_id": None, "roles": [], "data": {}, "time": time.time()}], current
+            found = [event for s, event_topics, event in self._events
+                     if s > seq and event_topics & topics and (kinds is None or event["kind"] in kinds)]
+        return found, current
+
+    def subscribe(self, topics, kinds=None, where=None):
+        return Subscription(self, topics, kinds, where)
+
+    def attach(self, relay):
+        self._relay = relay
+
+
+# ------------------------- FILE RELAY (SEVERAL PROCESSES, ONE HOST) -------------------------
+class FileRelay:
+    """Share a bus's events with other processes through one append-only JSON-lines file."""
+
+    def __init__(self, bus, path, poll=RELAY_POLL_SECONDS):
+        self.bus = bus
+        self.path = path
+        self.poll = poll
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._write_lock = threading.Lock()
+        threading.Thread(target=self._follow, name="kmfx-events", daemon=True).start()
+
+    def send(self, event):
+        line = (json.dumps({"origin": self.origin, "event": event}, default=str) + "\n").encode()
+        try:
+            with self._write_lock:
+                if os.path.exists(self.path) and os.path.getsize(self.path) > MAX_RELAY_BYTES:
+                    os.replace(self.path, self.path + ".1")
+                # One O_APPEND write per line, so lines from different processes never interleave
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, line)
+                finally:
+                    os.close(fd)
+        except OSError as e:
+            print(f"Event relay write error: {e}")
+
+    def _follow(self):
+        handle, inode, partial = None, None, b""
+        started = True
+        while True:
+            try:
+                stat = os.stat(self.path)
+                if handle is not None and stat.st_ino != inode:
+                    partial = self._read(handle, partial)  # Rest of the rotated file, then the new one
+                    handle.close()
+                    handle, partial = None, b""
+                if handle is None:
+                    handle, inode = open(self.path, "rb"), stat.st_ino
+                    if started:
+                        handle.seek(0, os.SEEK_END)  # Only events published from now on
+                elif stat.st_size < handle.tell():
+                    handle.seek(0)  # Truncated in place
+                started = False
+                partial = self._read(handle, partial)
+            except FileNotFoundError:
+                started = False
+            except Exception as e:
+                print(f"Event relay read error: {e}")
+            time.sleep(self.poll)
+
+    def _read(self, handle, partial):
+        *lines, partial = (partial + handle.read()).split(b"\n")
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("origin") != self.origin:
+                self.bus.deliver(record["event"])
+        return partial
+
+
+# ------------------------- PROCESS-WIDE BUS -------------------------
+_bus = None
+_bus_lock = threading.Lock()
+
+def get_bus():
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = EventBus()
+            if EVENTS_FILE:
+                _bus.attach(FileRelay(_bus, EVENTS_FILE))
+    return _bus
+
+def publish(kind, client_id=None, **data):
+    """Publish after a committed write; a failure here never fails the write."""
+    try:
+        return get_bus().publish(kind, client_id, **data)
+    except Exception as e:
+        print(f"Event publish error: {e}")
+
+def subscribe(topics, kinds=None, where=None):
+    return get_bus().subscribe(topics, kinds, where)
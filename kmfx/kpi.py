@@ -0,0 +1,122 @@
+# ==================== KMFX KPI SNAPSHOT ====================
+"""Dashboard Home KPI tiles kept in a single kpi_snapshot row.
+
+Triggers on profits, withdrawals, clients and client_licenses adjust the row
+inside the same transaction as the write that changed the numbers, so every
+write path (single posts, bulk imports, status changes) keeps it current
+without calling anything. Active clients depend on the date as well, so that
+count is re-based once a day on the first read after midnight.
+
+Rebuild everything from the source tables:
+
+    python -m kmfx.kpi [path/to/db]
+"""
+
+import datetime
+
+from kmfx import writer as db_writer
+
+# A client is active when the expiry is missing/unparseable or after the as-of date
+_ACTIVE = "(CASE WHEN date({row}.expiry) IS NULL OR date({row}.expiry) > (SELECT active_as_of FROM kpi_snapshot WHERE id = 1) THEN 1 ELSE 0 END)"
+_REVENUE_PARTS = "COALESCE({row}.your_share, 0)", "COALESCE({row}.referral_bonus, 0)"
+_PAID = "(CASE WHEN {row}.status = 'Paid' THEN COALESCE({row}.amount, 0) ELSE 0 END)"
+_PENDING = "(CASE WHEN {row}.status = 'Pending' THEN COALESCE({row}.amount, 0) ELSE 0 END)"
+
+def _trigger(name, event, table, sets):
+    return (f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} BEGIN "
+            f"UPDATE kpi_snapshot SET {sets} WHERE id = 1; END")
+
+def _delta(expression):
+    """(+NEW) - (OLD) for an expression written against {row}."""
+    return f"{expression.format(row='NEW')} - {expression.format(row='OLD')}"
+
+KPI_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS kpi_snapshot (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        owner_share REAL NOT NULL DEFAULT 0,
+        referral_bonus REAL NOT NULL DEFAULT 0,
+        paid_withdrawals REAL NOT NULL DEFAULT 0,
+        pending_withdrawals REAL NOT NULL DEFAULT 0,
+        total_clients INTEGER NOT NULL DEFAULT 0,
+        active_clients INTEGER NOT NULL DEFAULT 0,
+        active_as_of TEXT,
+        licenses_issued INTEGER NOT NULL DEFAULT 0
+    )''',
+    "INSERT OR IGNORE INTO kpi_snapshot (id) VALUES (1)",
+    # Profits: your share and referral bonuses make up total revenue
+    _trigger("kpi_profits_insert", "INSERT", "profits",
+             "owner_share = owner_share + COALESCE(NEW.your_share, 0), "
+             "referral_bonus = referral_bonus + COALESCE(NEW.referral_bonus, 0)"),
+    _trigger("kpi_profits_delete", "DELETE", "profits",
+             "owner_share = owner_share - COALESCE(OLD.your_share, 0), "
+             "referral_bonus = referral_bonus - COALESCE(OLD.referral_bonus, 0)"),
+    _trigger("kpi_profits_update", "UPDATE OF your_share, referral_bonus", "profits",
+             f"owner_share = owner_share + {_delta(_REVENUE_PARTS[0])}, "
+             f"referral_bonus = referral_bonus + {_delta(_REVENUE_PARTS[1])}"),
+    # Withdrawals: paid and pending totals follow status changes
+    _trigger("kpi_withdrawals_insert", "INSERT", "withdrawals",
+             f"paid_withdrawals = paid_withdrawals + {_PAID.format(row='NEW')}, "
+             f"pending_withdrawals = pending_withdrawals + {_PENDING.format(row='NEW')}"),
+    _trigger("kpi_withdrawals_delete", "DELETE", "withdrawals",
+             f"paid_withdrawals = paid_withdrawals - {_PAID.format(row='OLD')}, "
+             f"pending_withdrawals = pending_withdrawals - {_PENDING.format(row='OLD')}"),
+    _trigger("kpi_withdrawals_update", "UPDATE OF status, amount", "withdrawals",
+             f"paid_withdrawals = paid_withdrawals + {_delta(_PAID)}, "
+             f"pending_withdrawals = pending_withdrawals + {_delta(_PENDING)}"),
+    # Clients: head count and active count
+    _trigger("kpi_clients_insert", "INSERT", "clients",
+             f"total_clients = total_clients + 1, active_clients = active_clients + {_ACTIVE.format(row='NEW')}"),
+    _trigger("kpi_clients_delete", "DELETE", "clients",
+             f"total_clients = total_clients - 1, active_clients = active_clients - {_ACTIVE.format(row='OLD')}"),
+    _trigger("kpi_clients_update", "UPDATE OF expiry", "clients",
+             f"active_clients = active_clients + {_delta(_ACTIVE)}"),
+    # Licenses issued
+    _trigger("kpi_licenses_insert", "INSERT", "client_licenses", "licenses_issued = licenses_issued + 1"),
+    _trigger("kpi_licenses_delete", "DELETE", "client_licenses", "licenses_issued = licenses_issued - 1"),
+]
+
+COLUMNS = ["owner_share", "referral_bonus", "paid_withdrawals", "pending_withdrawals",
+           "total_clients", "active_clients", "active_as_of", "licenses_issued"]
+
+# ------------------------- MAINTENANCE (RUN INSIDE A WRITE) -------------------------
+def rebuild(cur, today=None):
+    """Recompute the whole snapshot from the source tables."""
+    today = (today or datetime.date.today()).isoformat()
+    cur.execute("INSERT OR IGNORE INTO kpi_snapshot (id) VALUES (1)")
+    cur.execute("""UPDATE kpi_snapshot SET
+                       owner_share = (SELECT COALESCE(SUM(your_share), 0) FROM profits),
+                       referral_bonus = (SELECT COALESCE(SUM(referral_bonus), 0) FROM profits),
+                       paid_withdrawals = (SELECT COALESCE(SUM(amount), 0) FROM withdrawals WHERE status = 'Paid'),
+                       pending_withdrawals = (SELECT COALESCE(SUM(amount), 0) FROM withdrawals WHERE status = 'Pending'),
+                       total_clients = (SELECT COUNT(*) FROM clients),
+                       licenses_issued = (SELECT COUNT(*) FROM client_licenses),
+                       active_as_of = ?
+                   WHERE id = 1""", (today,))
+    _count_active(cur)
+
+def rebase_active(cur, today):
+    """Recount active clients as of a new day (clients expire without any write)."""
+    cur.execute("UPDATE kpi_snapshot SET active_as_of = ? WHERE id = 1", (today,))
+    _count_active(cur)
+
+def _count_active(cur):
+    cur.execute(f"UPDATE kpi_snapshot SET active_clients = (SELECT COALESCE(SUM({_ACTIVE.format(row='clients')}), 0) FROM clients) WHERE id = 1")
+
+# ------------------------- READ -------------------------
+def snapshot(db):
+    """The KPI row as a dict, re-basing the active count first if the day has changed."""
+    today = datetime.date.today().isoformat()
+    row = dict(zip(COLUMNS, db.execute(f"SELECT {', '.join(COLUMNS)} FROM kpi_snapshot WHERE id = 1").fetchone()))
+    if row["active_as_of"] != today:
+        db_writer.write(rebase_active, today)
+        row = dict(zip(COLUMNS, db.execute(f"SELECT {', '.join(COLUMNS)} FROM kpi_snapshot WHERE id = 1").fetchone()))
+    row["total_revenue"] = row["owner_share"] + row["referral_bonus"]
+    return row
+
+if __name__ == "__main__":
+    import sys
+    from kmfx.db import run_write
+
+    db, _ = run_write(sys.argv[1] if len(sys.argv) > 1 else None, rebuild)
+    for name, value in snapshot(db).items():
+        print(f"{name:20} {value}")
@@ -0,0 +1,310 @@
+# ==================== KMFX DATABASE MIGRATIONS ====================
+"""Numbered schema migrations for the KMFX database.
+
+Every step in MIGRATIONS runs at most once. The number of the last applied
+step is stored in ``PRAGMA user_version``, so an up-to-date database costs a
+single integer comparison at startup.
+"""
+
+from kmfx import conversations, kpi, referrals, rollups, table_versions
+
+# ------------------------- HELPERS -------------------------
+def table_columns(cur, table):
+    return {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+
+def add_missing_columns(cur, table, columns):
+    existing = table_columns(cur, table)
+    for column, definition in columns:
+        if column not in existing:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+# ------------------------- 1: BASE SCHEMA -------------------------
+BASE_TABLES = [
+    '''CREATE TABLE IF NOT EXISTS clients (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        type TEXT DEFAULT 'Regular',
+        accounts TEXT,
+        expiry TEXT,
+        start_balance REAL DEFAULT 0,
+        current_equity REAL DEFAULT 0,
+        withdrawable_balance REAL DEFAULT 0,
+        add_date TEXT,
+        referred_by INTEGER,
+        referral_code TEXT UNIQUE,
+        notes TEXT,
+        address TEXT,
+        mobile_number TEXT
+    )''',
+    '''CREATE TABLE IF NOT EXISTS users (
+        client_id INTEGER UNIQUE,
+        username TEXT UNIQUE,
+        password TEXT
+    )''',
+    '''CREATE TABLE IF NOT EXISTS admins (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE,
+        password TEXT,
+        name TEXT
+    )''',
+    '''CREATE TABLE IF NOT EXISTS profits (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        client_id INTEGER,
+        profit REAL,
+        date TEXT,
+        client_share REAL,
+        your_share REAL,
+        referral_bonus REAL DEFAULT 0
+    )''',
+    '''CREATE TABLE IF NOT EXISTS client_licenses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        client_id INTEGER,
+        key TEXT,
+        enc_data TEXT,
+        version TEXT,
+        date_generated TEXT,
+        expiry TEXT,
+        allow_live INTEGER DEFAULT 1
+    )''',
+    '''CREATE TABLE IF NOT EXISTS client_files (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        client_id INTEGER,
+        file_name TEXT,
+        original_name TEXT,
+        upload_date TEXT,
+        sent_by TEXT,
+        notes TEXT
+    )''',
+    '''CREATE TABLE IF NOT EXISTS announcements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT,
+        message TEXT,
+        date TEXT,
+        posted_by TEXT,
+        likes INTEGER DEFAULT 0
+    )''',
+    '''CREATE TABLE IF NOT EXISTS announcement_files (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        announcement_id INTEGER,
+        file_name TEXT,
+        original_name TEXT
+    )''',
+    '''CREATE TABLE IF NOT EXISTS messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        from_client_id INTEGER DEFAULT NULL,
+        from_admin TEXT DEFAULT NULL,
+        to_client_id INTEGER DEFAULT NULL,
+        message TEXT,
+        timestamp TEXT,
+        read INTEGER DEFAULT 0
+    )''',
+    '''CREATE TABLE IF NOT EXISTS message_attachments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        message_id INTEGER,
+        file_name TEXT,
+        original_name TEXT
+    )''',
+    '''CREATE TABLE IF NOT EXISTS notifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        client_id INTEGER,
+        title TEXT,
+        message TEXT,
+        category TEXT DEFAULT 'General',
+        date TEXT,
+        read INTEGER DEFAULT 0
+    )''',
+    '''CREATE TABLE IF NOT EXISTS withdrawals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        client_id INTEGER,
+        amount REAL,
+        method TEXT,
+        details TEXT,
+        status TEXT DEFAULT 'Pending',
+        date_requested TEXT,
+        date_processed TEXT DEFAULT NULL,
+        processed_by TEXT DEFAULT NULL,
+        notes TEXT
+    )''',
+    '''CREATE TABLE IF NOT EXISTS ea_versions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        version TEXT,
+        file_name TEXT,
+        upload_date TEXT,
+        notes TEXT
+    )''',
+    '''CREATE TABLE IF NOT EXISTS announcement_comments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        announcement_id INTEGER,
+        commenter_name TEXT,
+        comment TEXT,
+        timestamp TEXT
+    )''',
+    '''CREATE TABLE IF NOT EXISTS logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        action TEXT,
+        details TEXT,
+        user_type TEXT,
+        user_id INTEGER DEFAULT NULL
+    )'''
+]
+
+def _base_schema(cur):
+    for sql in BASE_TABLES:
+        cur.execute(sql)
+
+# ------------------------- 2: COLUMNS ADDED AFTER THE FIRST RELEASE -------------------------
+def _legacy_columns(cur):
+    add_missing_columns(cur, "clients", [
+        ("current_equity", "REAL DEFAULT 0"),
+        ("withdrawable_balance", "REAL DEFAULT 0"),
+        ("referred_by", "INTEGER"),
+        ("address", "TEXT"),
+        ("mobile_number", "TEXT"),
+    ])
+    # SQLite cannot ADD a UNIQUE column, so old databases get a unique index instead
+    if "referral_code" not in table_columns(cur, "clients"):
+        cur.execute("ALTER TABLE clients ADD COLUMN referral_code TEXT")
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_clients_referral_code ON clients(referral_code)")
+    add_missing_columns(cur, "notifications", [("read", "INTEGER DEFAULT 0")])
+    add_missing_columns(cur, "announcements", [("likes", "INTEGER DEFAULT 0")])
+    add_missing_columns(cur, "admins", [("name", "TEXT")])
+
+# ------------------------- 3: INDEXES FOR HOT QUERY PATHS (SEE kmfx/query_plans.py) -------------------------
+HOT_PATH_INDEXES = [
+    # Client profit history, equity chart and earnings totals; covers the selected columns
+    "CREATE INDEX IF NOT EXISTS idx_profits_client_date ON profits(client_id, date, profit, client_share, your_share, referral_bonus)",
+    # Chat threads: WHERE from_client_id = ? OR to_client_id = ? ORDER BY timestamp
+    "CREATE INDEX IF NOT EXISTS idx_messages_from_ts ON messages(from_client_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_messages_to_ts ON messages(to_client_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_message_attachments_message ON message_attachments(message_id)",
+    # Client notification feed: WHERE client_id = ? ORDER BY read, date DESC
+    "CREATE INDEX IF NOT EXISTS idx_notifications_client_read_date ON notifications(client_id, read, date)",
+    # Admin withdrawal queues by status, client withdrawal history
+    "CREATE INDEX IF NOT EXISTS idx_withdrawals_status_date ON withdrawals(status, date_requested)",
+    "CREATE INDEX IF NOT EXISTS idx_withdrawals_client_date ON withdrawals(client_id, date_requested)",
+    # Referral lookups and the Pioneer pickers
+    "CREATE INDEX IF NOT EXISTS idx_clients_referred_by ON clients(referred_by)",
+    "CREATE INDEX IF NOT EXISTS idx_clients_type_name ON clients(type, name)",
+    # Audit log views ordered by time
+    "CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp)",
+    # Announcement feed and per-card attachments/comments
+    "CREATE INDEX IF NOT EXISTS idx_announcements_date ON announcements(date)",
+    "CREATE INDEX IF NOT EXISTS idx_announcement_files_announcement ON announcement_files(announcement_id)",
+    "CREATE INDEX IF NOT EXISTS idx_announcement_comments_announcement ON announcement_comments(announcement_id, timestamp)",
+    # Per-client file and license lists
+    "CREATE INDEX IF NOT EXISTS idx_client_files_client_date ON client_files(client_id, upload_date)",
+    "CREATE INDEX IF NOT EXISTS idx_client_licenses_client_date ON client_licenses(client_id, date_generated)",
+]
+
+def _hot_path_indexes(cur):
+    for sql in HOT_PATH_INDEXES:
+        cur.execute(sql)
+
+# ------------------------- 4: REFERRAL CLOSURE TABLE (SEE kmfx/referrals.py) -------------------------
+def _referral_closure(cur):
+    for sql in referrals.CLOSURE_SCHEMA:
+        cur.execute(sql)
+    referrals.rebuild(cur)
+
+# ------------------------- 5: REFERRAL SUBTREE VERSIONS (CACHE KEYS FOR MY REFERRALS) -------------------------
+def _referral_tree_versions(cur):
+    for sql in referrals.TREE_VERSION_SCHEMA:
+        cur.execute(sql)
+
+# ------------------------- 6: KPI SNAPSHOT FOR DASHBOARD HOME (SEE kmfx/kpi.py) -------------------------
+def _kpi_snapshot(cur):
+    for sql in kpi.KPI_SCHEMA:
+        cur.execute(sql)
+    kpi.rebuild(cur)
+
+# ------------------------- 7: DAILY/MONTHLY PROFIT ROLLUPS (SEE kmfx/rollups.py) -------------------------
+def _profit_rollups(cur):
+    for sql in rollups.ROLLUP_SCHEMA:
+        cur.execute(sql)
+    rollups.rebuild(cur)
+
+# ------------------------- 8: PER-TABLE VERSIONS FOR CACHE KEYS (SEE kmfx/table_versions.py) -------------------------
+def _table_versions(cur):
+    for sql in table_versions.VERSION_SCHEMA:
+        cur.execute(sql)
+    for table in table_versions.TRACKED_TABLES:
+        table_versions.track(cur, table)
+
+# ------------------------- 9: PER-ROW VERSIONS FOR SESSION SNAPSHOTS (SEE kmfx/table_versions.py) -------------------------
+def _row_versions(cur):
+    for sql in table_versions.ROW_VERSION_SCHEMA:
+        cur.execute(sql)
+    for table in table_versions.TRACKED_ROWS:
+        table_versions.track_rows(cur, table)
+
+# ------------------------- 10: CONVERSATION SUMMARIES FOR THE INBOX (SEE kmfx/conversations.py) -------------------------
+def _conversations(cur):
+    for sql in conversations.CONVERSATION_SCHEMA:
+        cur.execute(sql)
+    conversations.rebuild(cur)
+
+# ------------------------- 11: KEYSET INDEXES FOR CHAT THREADS (SEE kmfx/conversations.py) -------------------------
+def _thread_indexes(cur):
+    for sql in conversations.THREAD_INDEXES:
+        cur.execute(sql)
+
+# ------------------------- 12: PER-CLIENT FEED VERSIONS FOR LIVE UPDATES (SEE kmfx/table_versions.py) -------------------------
+def _client_feed_versions(cur):
+    for table in table_versions.TRACKED_CLIENT_FEEDS:
+        table_versions.track_rows(cur, table, column="client_id")
+
+# ------------------------- 13: FEEDS COUNTED ON NEW ROWS ONLY (SEE kmfx/table_versions.py) -------------------------
+def _new_rows_only_feeds(cur):
+    for table in table_versions.NEW_ROWS_ONLY_FEEDS:
+        table_versions.count_new_rows_only(cur, table)
+
+# ------------------------- REGISTRY (APPEND ONLY, NEVER RENUMBER) -------------------------
+MIGRATIONS = [
+    (1, "Base schema", _base_schema),
+    (2, "Columns added after the first release", _legacy_columns),
+    (3, "Indexes for hot query paths", _hot_path_indexes),
+    (4, "Referral closure table", _referral_closure),
+    (5, "Referral subtree versions", _referral_tree_versions),
+    (6, "KPI snapshot", _kpi_snapshot),
+    (7, "Daily and monthly profit rollups", _profit_rollups),
+    (8, "Per-table versions", _table_versions),
+    (9, "Per-row versions", _row_versions),
+    (10, "Conversation summaries", _conversations),
+    (11, "Keyset indexes for chat threads", _thread_indexes),
+    (12, "Per-client feed versions", _client_feed_versions),
+    (13, "Notification feed counts new rows only", _new_rows_only_feeds),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """Apply pending migrations in one transaction and return the schema version."""
+    if schema_version(conn) >= LATEST_VERSION:
+        return LATEST_VERSION
+
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-read under the write lock: another process may have migrated meanwhile
+        current = schema_version(conn)
+        for version, _, step in MIGRATIONS:
+            if version > current:
+                step(cur)
+        cur.execute(f"PRAGMA user_version = {LATEST_VERSION}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return LATEST_VERSION
+
+if __name__ == "__main__":
+    import sys
+    from kmfx.db import connect
+    db = connect(sys.argv[1] if len(sys.argv) > 1 else None)
+    before = schema_version(db)
+    after = migrate(db)
+    print(f"Schema version: {before} -> {after}")
@@ -0,0 +1,162 @@
+# ==================== KMFX BULK PROFIT IMPORT ====================
+"""Post a day's profit/loss results for many clients at once.
+
+read_rows parses a CSV upload or pasted text, match resolves and validates
+every row, price runs all valid rows through kmfx.profit_engine in one
+vectorized pass, and post_batch writes every profit row
+and balance change as one write operation, so the whole batch commits or
+none of it does.
+
+Accepted columns (header optional, in this order when omitted):
+client (name, account or client id), profit, date (YYYY-MM-DD, default today).
+"""
+
+import csv
+import datetime
+import io
+
+import pandas as pd
+
+from kmfx import profit_engine
+
+COLUMNS = ["client", "profit", "date"]
+_ALIASES = {"client_id": "client", "name": "client", "account": "client", "accounts": "client",
+            "amount": "profit", "profit_loss": "profit", "record_date": "date"}
+
+# ------------------------- PARSING, MATCHING & PRICING -------------------------
+def _is_header(line):
+    """A first line naming at least one known column (or alias) and holding no number is a header."""
+    cells = [cell.strip().lower() for cell in next(csv.reader([line], skipinitialspace=True)) if cell.strip()]
+    known = set(COLUMNS) | set(_ALIASES)
+    return any(cell in known for cell in cells) and pd.to_numeric(pd.Series(cells), errors="coerce").isna().all()
+
+def read_rows(source):
+    """DataFrame with client/profit/date text columns and an ``error`` column from CSV bytes or pasted text.
+
+    Every row is read on its own: a short row is padded (date is optional) and a row
+    with more fields than columns is kept and flagged, so one row never fails the batch.
+    """
+    text = source.decode("utf-8-sig") if isinstance(source, bytes) else source
+    lines = [line for line in text.strip().splitlines() if line.strip()]
+    if not lines:
+        return pd.DataFrame(columns=COLUMNS + ["error"])
+    records = [[cell.strip() for cell in record]
+               for record in csv.reader(io.StringIO("\n".join(lines)), skipinitialspace=True)]
+    names = COLUMNS
+    if _is_header(lines[0]):
+        names = [_ALIASES.get(cell.lower(), cell.lower()) for cell in records.pop(0)]
+    width = len(names)
+    df = pd.DataFrame([record[:width] + [""] * (width - len(record)) for record in records],
+                      columns=range(width), dtype=str)
+    rows = pd.DataFrame({col: df[names.index(col)] if col in names else "" for col in COLUMNS}, index=df.index)
+    rows["error"] = [f"Too many fields ({len(record)}, expected at most {width})" if any(record[width:]) else ""
+                     for record in records]
+    return rows
+
+def match(rows, clients, default_date=None):
+    """One posting per input row with client_id, name, type and an ``error`` column (empty when valid).
+
+    clients: DataFrame with id, name, type, accounts.
+    """
+    default_date = default_date or datetime.date.today()
+    postings = rows.reset_index(drop=True).copy()
+    parse_errors = postings["error"] if "error" in postings else pd.Series("", index=postings.index)
+    postings["error"] = ""
+
+    # Client lookup: exact name (case-insensitive), then account, then numeric id
+    by_name = clients.assign(key=clients["name"].str.strip().str.lower())
+    duplicated_names = set(by_name.loc[by_name["key"].duplicated(), "key"])
+    name_ids = by_name.drop_duplicates("key").set_index("key")["id"]
+    account_ids = clients.assign(key=clients["accounts"].fillna("").astype(str).str.strip()) \
+                         .query("key != ''").drop_duplicates("key").set_index("key")["id"]
+    wanted = postings["client"].str.lower()
+    client_id = wanted.map(name_ids)
+    client_id = client_id.fillna(postings["client"].map(account_ids))
+    numeric = pd.to_numeric(postings["client"], errors="coerce")
+    client_id = client_id.fillna(numeric.where(numeric.isin(clients["id"])))
+    postings["client_id"] = client_id.fillna(0).astype(int)
+
+    postings.loc[postings["client_id"] == 0, "error"] = "Unknown client"
+    postings.loc[wanted.isin(duplicated_names), "error"] = "Ambiguous client name (use account or id)"
+    postings.loc[postings["client"] == "", "error"] = "Missing client"
+
+    postings["profit"] = pd.to_numeric(postings["profit"].str.replace(r"[$,\s]", "", regex=True), errors="coerce")
+    postings.loc[postings["profit"].isna() & (postings["error"] == ""), "error"] = "Profit is not a number"
+    postings.loc[(postings["profit"] == 0) & (postings["error"] == ""), "error"] = "Profit must be non-zero"
+
+    dates = pd.to_datetime(postings["date"].replace("", default_date.isoformat()), errors="coerce", format="%Y-%m-%d")
+    postings.loc[dates.isna() & (postings["error"] == ""), "error"] = "Date must be YYYY-MM-DD"
+    postings["date"] = dates.dt.date.astype(str)
+    postings.loc[parse_errors != "", "error"] = parse_errors
+
+    info = clients.set_index("id")
+    postings["name"] = postings["client_id"].map(info["name"]).fillna("")
+    postings["type"] = postings["client_id"].map(info["type"]).fillna("").str.strip()
+    return postings
+
+def price(postings, uplines):
+    """Add client_share, referral_bonus and owner_share to valid postings.
+
+    uplines: DataFrame with descendant_id, depth, ancestor_id, ancestor_type (depths 1-3).
+    Returns (postings, bonuses); bonuses has one row per referral bonus with
+    the index of the posting it came from.
+    """
+    postings = postings.copy()
+    valid = postings["error"] == ""
+    # Invalid rows are priced as zero so every posting keeps its row number
+    shares, bonuses = profit_engine.split_profits(postings["client_id"], postings["profit"].where(valid, 0.0),
+                                                  postings["type"].where(valid, ""),
+                                                  profit_engine.build_upline_map(uplines))
+    for col in ["client_share", "referral_bonus", "owner_share"]:
+        postings[col] = shares[col].to_numpy()
+    bonuses["date"] = postings["date"].to_numpy()[bonuses["posting"].to_numpy()]
+    return postings, bonuses
+
+# ------------------------- POSTING (ONE WRITE OPERATION) -------------------------
+def _rows(df, cols):
+    # tolist() turns NumPy scalars into plain Python values sqlite3 can bind
+    return list(zip(*(df[col].tolist() for col in cols)))
+
+def post_batch(cur, postings, bonuses):
+    """Write every valid posting, its bonuses and all balance changes. Run through the writer."""
+    valid = postings[postings["error"] == ""]
+    cur.executemany("""INSERT INTO profits (client_id, profit, date, referral_bonus, client_share, your_share)
+                       VALUES (?, 0.0, ?, ?, 0.0, 0.0)""",
+                    _rows(bonuses, ["pioneer_id", "date", "bonus"]))
+    cur.executemany("""INSERT INTO profits (client_id, profit, date, client_share, your_share)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    _rows(valid, ["client_id", "profit", "date", "client_share", "owner_share"]))
+
+    # One UPDATE per client touched, however many rows it had
+    deltas = pd.concat([
+        pd.DataFrame({"id": valid["client_id"], "equity": valid["profit"], "withdrawable": valid["client_share"]}),
+        pd.DataFrame({"id": bonuses["pioneer_id"], "equity": 0.0, "withdrawable": bonuses["bonus"]}),
+    ]).groupby("id", as_index=False).sum()
+    cur.executemany("""UPDATE clients
+                       SET current_equity = current_equity + ?,
+                           withdrawable_balance = withdrawable_balance + ?
+                       WHERE id = ?""",
+                    _rows(deltas, ["equity", "withdrawable", "id"]))
+    return summarize(postings, bonuses)
+
+def summarize(postings, bonuses):
+    valid = postings[postings["error"] == ""]
+    return {
+        "rows": len(valid),
+        "skipped": len(postings) - len(valid),
+        "clients": valid["client_id"].nunique(),
+        "profit": float(valid["profit"].sum()),
+        "client_share": float(valid["client_share"].sum()),
+        "referral_bonus": float(bonuses["bonus"].sum()),
+        "bonus_rows": len(bonuses),
+        "owner_share": float(valid["owner_share"].sum()),
+    }
+
+def load_uplines(db, client_ids):
+    """Levels 1-3 above each client, for price(). One closure-table query."""
+    return pd.read_sql("""SELECT rc.descendant_id, rc.depth, rc.ancestor_id, c.type AS ancestor_type
+                          FROM referral_closure rc
+                          JOIN clients c ON c.id = rc.ancestor_id
+                          WHERE rc.descendant_id IN (SELECT value FROM json_each(?))
+                            AND rc.depth BETWEEN 1 AND ?""",
+                       db, params=(pd.Series(client_ids, dtype=int).to_json(orient="values"), profit_engine.BONUS_LEVELS))
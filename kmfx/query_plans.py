@@ -0,0 +1,157 @@
+# ==================== KMFX QUERY PLAN CHECK ====================
+"""EXPLAIN QUERY PLAN check for the queries the dashboard runs on every rerun.
+
+Register a query in HOT_QUERIES when a page starts issuing it; the check
+flags any plan step that reads a whole table instead of an index.
+
+    python -m kmfx.query_plans [path/to/db]
+"""
+
+import re
+
+# === REGISTERED HOT QUERIES (NAME -> SQL, SAMPLE PARAMS) ===
+HOT_QUERIES = {
+    "client profit history": (
+        "SELECT date, profit, client_share, your_share, referral_bonus FROM profits WHERE client_id = ? ORDER BY date DESC",
+        (1,)),
+    "client earnings totals": (
+        "SELECT client_share, referral_bonus FROM profits WHERE client_id = ?",
+        (1,)),
+    "chat thread page": (
+        "SELECT * FROM (SELECT id, from_client_id, from_admin, message, timestamp FROM messages "
+        "WHERE from_client_id = ? AND id < ? ORDER BY id DESC LIMIT ?) "
+        "UNION SELECT * FROM (SELECT id, from_client_id, from_admin, message, timestamp FROM messages "
+        "WHERE to_client_id = ? AND id < ? ORDER BY id DESC LIMIT ?) ORDER BY id DESC LIMIT ?",
+        (1, 1000, 50, 1, 1000, 50, 50)),
+    "chat thread newer": (
+        "SELECT id, from_client_id, from_admin, message, timestamp FROM messages WHERE from_client_id = ? AND id > ? "
+        "UNION SELECT id, from_client_id, from_admin, message, timestamp FROM messages WHERE to_client_id = ? AND id > ? "
+        "ORDER BY id",
+        (1, 0, 1, 0)),
+    "inbox": (
+        "SELECT c.id, c.name, cv.total AS total_msgs, cv.unread_admin AS unread FROM conversations cv "
+        "JOIN clients c ON c.id = cv.client_id ORDER BY cv.last_ts DESC, c.name",
+        ()),
+    "conversation summary": (
+        "SELECT last_ts, total, unread_admin, unread_client FROM conversations WHERE client_id = ?",
+        (1,)),
+    "mark support replies read": (
+        "UPDATE messages SET read = 1 WHERE to_client_id = ? AND from_client_id IS NULL AND read = 0",
+        (1,)),
+    "mark client messages read": (
+        "UPDATE messages SET read = 1 WHERE from_client_id = ? AND read = 0",
+        (1,)),
+    "client notifications": (
+        "SELECT id, title, message, category, date, read FROM notifications WHERE client_id = ? ORDER BY read ASC, date DESC",
+        (1,)),
+    "pending withdrawals": (
+        "SELECT w.id, w.amount, c.name FROM withdrawals w JOIN clients c ON w.client_id = c.id "
+        "WHERE w.status = 'Pending' ORDER BY w.date_requested DESC",
+        ()),
+    "client recent withdrawals": (
+        "SELECT amount, status, date_requested FROM withdrawals WHERE client_id = ? ORDER BY date_requested DESC LIMIT 8",
+        (1,)),
+    "client row": (
+        "SELECT * FROM clients WHERE id = ?",
+        (1,)),
+    "client withdrawal history": (
+        "SELECT * FROM withdrawals WHERE client_id = ? ORDER BY date_requested DESC",
+        (1,)),
+    "direct referrals": (
+        "SELECT id, name, type FROM clients WHERE referred_by = ?",
+        (1,)),
+    "upline chain": (
+        "SELECT rc.depth, c.id, c.name, c.type FROM referral_closure rc JOIN clients c ON c.id = rc.ancestor_id "
+        "WHERE rc.descendant_id = ? AND rc.depth BETWEEN 1 AND ? ORDER BY rc.depth",
+        (1, 3)),
+    "referral subtree": (
+        "SELECT c.id, c.name, c.type, c.referred_by FROM referral_closure rc JOIN clients c ON c.id = rc.descendant_id "
+        "WHERE rc.ancestor_id = ? AND rc.depth > 0 ORDER BY rc.depth, c.id",
+        (1,)),
+    "referral subtree version": (
+        "SELECT version FROM referral_tree_versions WHERE client_id = ?",
+        (1,)),
+    "downline counts": (
+        "SELECT COALESCE(SUM(depth = 1), 0), COUNT(*) FROM referral_closure WHERE ancestor_id = ? AND depth > 0",
+        (1,)),
+    "referral bonus history": (
+        "SELECT p.date, p.referral_bonus, c.name AS from_client FROM referral_closure rc "
+        "JOIN profits p ON p.client_id = rc.descendant_id JOIN clients c ON c.id = p.client_id "
+        "WHERE rc.ancestor_id = ? AND p.referral_bonus > 0 ORDER BY p.date DESC",
+        (1,)),
+    "pioneer picker": (
+        "SELECT id, name FROM clients WHERE type = 'Pioneer' ORDER BY name",
+        ()),
+    "referral code suffixes": (
+        "SELECT referral_code FROM clients WHERE referral_code >= ? AND referral_code < ?",
+        ("alice1", "alice2")),
+    "kpi snapshot": (
+        "SELECT owner_share, referral_bonus, paid_withdrawals, pending_withdrawals, total_clients, active_clients, "
+        "active_as_of, licenses_issued FROM kpi_snapshot WHERE id = 1",
+        ()),
+    "monthly profit rollup": (
+        "SELECT period, profit, client_share, your_share, referral_bonus, records FROM profit_rollup_monthly "
+        "WHERE client_id = ? AND records > 0 ORDER BY period",
+        (0,)),
+    "daily profit rollup": (
+        "SELECT period, profit, client_share, your_share, referral_bonus, records FROM profit_rollup_daily "
+        "WHERE client_id = ? AND records > 0 ORDER BY period",
+        (1,)),
+    "table versions": (
+        "SELECT name, version FROM table_versions WHERE name IN (?, ?)",
+        ("clients", "profits")),
+    "row version": (
+        "SELECT version FROM row_versions WHERE name = ? AND row_id = ?",
+        ("clients", 1)),
+    "recent logs": (
+        "SELECT action, details, timestamp FROM logs ORDER BY timestamp DESC LIMIT 20",
+        ()),
+    "announcement feed": (
+        "SELECT id, title, message, date, posted_by, likes FROM announcements ORDER BY date DESC LIMIT 20",
+        ()),
+    "announcement attachments": (
+        "SELECT file_name, original_name FROM announcement_files WHERE announcement_id = ?",
+        (1,)),
+    "announcement comments": (
+        "SELECT commenter_name, comment, timestamp, id FROM announcement_comments WHERE announcement_id = ? ORDER BY timestamp ASC",
+        (1,)),
+    "client files": (
+        "SELECT original_name, upload_date, sent_by, notes, file_name FROM client_files WHERE client_id = ? ORDER BY upload_date DESC",
+        (1,)),
+    "client licenses": (
+        "SELECT date_generated, expiry, allow_live, version FROM client_licenses WHERE client_id = ? ORDER BY date_generated DESC LIMIT 7",
+        (1,)),
+}
+
+# "SCAN profits" is a full table scan; "SCAN logs USING INDEX ..." walks an index and is fine
+_FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+def explain(conn, sql, params=()):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+def check_query_plans(conn, queries=None):
+    """Return {name: (plan_steps, full_scan_steps)} for every registered query."""
+    report = {}
+    for name, (sql, params) in (queries or HOT_QUERIES).items():
+        steps = explain(conn, sql, params)
+        report[name] = (steps, [step for step in steps if _FULL_SCAN.match(step)])
+    return report
+
+def full_scans(conn, queries=None):
+    return {name: scans for name, (_, scans) in check_query_plans(conn, queries).items() if scans}
+
+if __name__ == "__main__":
+    import sys
+    from kmfx.db import connect
+    from kmfx.migrations import migrate
+
+    db = connect(sys.argv[1] if len(sys.argv) > 1 else None)
+    migrate(db)
+    flagged = 0
+    for name, (steps, scans) in check_query_plans(db).items():
+        flagged += bool(scans)
+        print(f"{'FULL SCAN' if scans else 'ok':9}  {name}")
+        for step in steps:
+            print(f"           {step}")
+    print(f"\n{flagged} of {len(HOT_QUERIES)} registered queries scan a whole table")
+    sys.exit(1 if flagged else 0)
@@ -0,0 +1,146 @@
+# ==================== KMFX REFERRAL CLOSURE ====================
+"""Referral tree stored as a closure table.
+
+referral_closure holds one row per (ancestor, descendant) pair with the
+number of levels between them, plus a depth-0 row for every client. Upline
+chains, downline counts and everything under a Pioneer are then single
+indexed queries instead of walks along clients.referred_by.
+
+add_client and move_subtree keep the table in step with clients.referred_by;
+call them from the same write that changes the clients row. They also bump
+referral_tree_versions for every client above the change, so a cached
+subtree is reused until something underneath it actually changes (call
+touch when a member's name or type is edited). To rebuild the table from
+clients.referred_by:
+
+    python -m kmfx.referrals [path/to/db]
+"""
+
+CLOSURE_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS referral_closure (
+        ancestor_id INTEGER NOT NULL,
+        descendant_id INTEGER NOT NULL,
+        depth INTEGER NOT NULL,
+        PRIMARY KEY (ancestor_id, descendant_id)
+    ) WITHOUT ROWID''',
+    # Upline lookups go by descendant
+    "CREATE INDEX IF NOT EXISTS idx_referral_closure_descendant ON referral_closure(descendant_id, depth)",
+]
+
+TREE_VERSION_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS referral_tree_versions (
+        client_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )''',
+]
+
+# ------------------------- MAINTENANCE (RUN INSIDE A WRITE) -------------------------
+def rebuild(cur):
+    """Recompute the whole table from clients.referred_by. Returns the number of rows written."""
+    parents = {client_id: referred_by or 0
+               for client_id, referred_by in cur.execute("SELECT id, referred_by FROM clients")}
+    rows = []
+    for client_id, parent in parents.items():
+        rows.append((client_id, client_id, 0))
+        seen = {client_id}
+        depth = 1
+        # Stops at the top of the chain, at a referrer that no longer exists, or on a loop in old data
+        while parent in parents and parent not in seen:
+            rows.append((parent, client_id, depth))
+            seen.add(parent)
+            parent = parents[parent]
+            depth += 1
+    cur.execute("DELETE FROM referral_closure")
+    cur.executemany("INSERT INTO referral_closure (ancestor_id, descendant_id, depth) VALUES (?, ?, ?)", rows)
+    # Any tree may have changed; the versions table only exists from migration 5 on
+    if cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'referral_tree_versions'").fetchone():
+        cur.execute("""INSERT INTO referral_tree_versions (client_id, version)
+                       SELECT id, 1 FROM clients WHERE true
+                       ON CONFLICT(client_id) DO UPDATE SET version = version + 1""")
+    return len(rows)
+
+def touch(cur, client_id):
+    """Mark the subtrees of a client and of everyone above it as changed."""
+    cur.execute("""INSERT INTO referral_tree_versions (client_id, version)
+                   SELECT ancestor_id, 1 FROM referral_closure WHERE descendant_id = ? AND true
+                   ON CONFLICT(client_id) DO UPDATE SET version = version + 1""",
+                (client_id,))
+
+def add_client(cur, client_id, referred_by):
+    """Link a newly inserted client under its referrer (0 or None for no referrer)."""
+    cur.execute("""INSERT INTO referral_closure (ancestor_id, descendant_id, depth)
+                   SELECT ancestor_id, ?, depth + 1 FROM referral_closure WHERE descendant_id = ?
+                   UNION ALL
+                   SELECT ?, ?, 0""",
+                (client_id, referred_by or 0, client_id, client_id))
+    touch(cur, client_id)
+
+def move_subtree(cur, client_id, referred_by):
+    """Re-parent a client and its whole downline. Call before updating clients.referred_by."""
+    referred_by = referred_by or 0
+    current = cur.execute("SELECT ancestor_id FROM referral_closure WHERE descendant_id = ? AND depth = 1",
+                          (client_id,)).fetchone()
+    if (current[0] if current else 0) == referred_by:
+        return
+    if referred_by and cur.execute("SELECT 1 FROM referral_closure WHERE ancestor_id = ? AND descendant_id = ?",
+                                   (client_id, referred_by)).fetchone():
+        raise ValueError("A client cannot be referred by themselves or by someone in their own downline.")
+
+    touch(cur, client_id)  # The old upline loses this subtree
+
+    # Detach the subtree from every ancestor above the client, then hang it under the new referrer
+    cur.execute("""DELETE FROM referral_closure
+                   WHERE descendant_id IN (SELECT descendant_id FROM referral_closure WHERE ancestor_id = ?)
+                     AND ancestor_id NOT IN (SELECT descendant_id FROM referral_closure WHERE ancestor_id = ?)""",
+                (client_id, client_id))
+    cur.execute("""INSERT INTO referral_closure (ancestor_id, descendant_id, depth)
+                   SELECT up.ancestor_id, sub.descendant_id, up.depth + sub.depth + 1
+                   FROM referral_closure up, referral_closure sub
+                   WHERE up.descendant_id = ? AND sub.ancestor_id = ?""",
+                (referred_by, client_id))
+    touch(cur, client_id)  # The new upline gains it
+
+# ------------------------- QUERIES -------------------------
+def upline(db, client_id, levels=3):
+    """[(depth, id, name, type)] for the referrers above a client, nearest first."""
+    return db.execute("""SELECT rc.depth, c.id, c.name, c.type
+                         FROM referral_closure rc
+                         JOIN clients c ON c.id = rc.ancestor_id
+                         WHERE rc.descendant_id = ? AND rc.depth BETWEEN 1 AND ?
+                         ORDER BY rc.depth""",
+                      (client_id, levels)).fetchall()
+
+def tree_version(db, client_id):
+    row = db.execute("SELECT version FROM referral_tree_versions WHERE client_id = ?", (client_id,)).fetchone()
+    return row[0] if row else 0
+
+def subtree(db, client_id):
+    """Nested [{id, name, type, children}] for everyone below a client, read in one query."""
+    rows = db.execute("""SELECT c.id, c.name, c.type, c.referred_by
+                         FROM referral_closure rc
+                         JOIN clients c ON c.id = rc.descendant_id
+                         WHERE rc.ancestor_id = ? AND rc.depth > 0
+                         ORDER BY rc.depth, c.id""",
+                      (client_id,)).fetchall()
+    # Adjacency map: parent id -> child list. Depth order puts every parent before its children.
+    children = {client_id: []}
+    for node_id, name, node_type, parent_id in rows:
+        node = {"id": node_id, "name": name, "type": node_type, "children": []}
+        children[node_id] = node["children"]
+        children.setdefault(parent_id, []).append(node)
+    return children[client_id]
+
+def downline_counts(db, client_id):
+    """(direct referrals, whole downline) for a client."""
+    direct, total = db.execute("""SELECT COALESCE(SUM(depth = 1), 0), COUNT(*)
+                                  FROM referral_closure
+                                  WHERE ancestor_id = ? AND depth > 0""",
+                               (client_id,)).fetchone()
+    return direct, total
+
+if __name__ == "__main__":
+    import sys
+    from kmfx.db import run_write
+
+    db, written = run_write(sys.argv[1] if len(sys.argv) > 1 else None, rebuild)
+    print(f"Rebuilt referral_closure: {written} rows")
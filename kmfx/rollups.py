@@ -0,0 +1,102 @@
+# ==================== KMFX PROFIT ROLLUPS ====================
+"""Daily and monthly profit totals, firm-wide and per client.
+
+profit_rollup_daily and profit_rollup_monthly hold one row per (period,
+client_id) with the summed profit columns and the number of profit records.
+client_id 0 is the firm-wide total (-1 collects profits without a client).
+Triggers on profits keep both tables current inside the transaction that
+changed profits, so charts and reports read a few dozen pre-aggregated rows
+instead of the whole table.
+
+Profits whose date cannot be parsed are counted under the period '' so the
+totals still match the profits table; charts skip that bucket.
+
+Rebuild both tables from profits:
+
+    python -m kmfx.rollups [path/to/db]
+"""
+
+import pandas as pd
+
+PERIODS = {
+    # table: SQLite expression for the period key of a profits row
+    "profit_rollup_daily": "COALESCE(date({row}.date), '')",
+    "profit_rollup_monthly": "COALESCE(strftime('%Y-%m', {row}.date), '')",
+}
+MEASURES = ["profit", "client_share", "your_share", "referral_bonus"]
+
+def _schema(table):
+    return f'''CREATE TABLE IF NOT EXISTS {table} (
+        period TEXT NOT NULL,
+        client_id INTEGER NOT NULL,
+        profit REAL NOT NULL DEFAULT 0,
+        client_share REAL NOT NULL DEFAULT 0,
+        your_share REAL NOT NULL DEFAULT 0,
+        referral_bonus REAL NOT NULL DEFAULT 0,
+        records INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (client_id, period)
+    ) WITHOUT ROWID'''
+
+def _apply(table, row, sign):
+    """Add (sign=+) or remove (sign=-) one profits row from its client and firm-wide buckets."""
+    period = PERIODS[table].format(row=row)
+    values = ", ".join(f"{sign}COALESCE({row}.{m}, 0)" for m in MEASURES)
+    updates = ", ".join(f"{m} = {m} + excluded.{m}" for m in MEASURES)
+    return " ".join(
+        f"INSERT INTO {table} (period, client_id, {', '.join(MEASURES)}, records) "
+        f"VALUES ({period}, {client}, {values}, {sign}1) "
+        f"ON CONFLICT(client_id, period) DO UPDATE SET {updates}, records = records + excluded.records;"
+        for client in (f"COALESCE({row}.client_id, -1)", "0"))
+
+def _triggers(table):
+    short = table.replace("profit_rollup_", "")
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS rollup_{short}_insert AFTER INSERT ON profits BEGIN {_apply(table, 'NEW', '+')} END",
+        f"CREATE TRIGGER IF NOT EXISTS rollup_{short}_delete AFTER DELETE ON profits BEGIN {_apply(table, 'OLD', '-')} END",
+        f"CREATE TRIGGER IF NOT EXISTS rollup_{short}_update AFTER UPDATE OF client_id, date, {', '.join(MEASURES)} ON profits "
+        f"BEGIN {_apply(table, 'OLD', '-')} {_apply(table, 'NEW', '+')} END",
+    ]
+
+ROLLUP_SCHEMA = [sql for table in PERIODS for sql in [_schema(table)] + _triggers(table)]
+
+# ------------------------- MAINTENANCE (RUN INSIDE A WRITE) -------------------------
+def rebuild(cur):
+    sums = ", ".join(f"COALESCE(SUM({m}), 0)" for m in MEASURES)
+    for table, period in PERIODS.items():
+        period = period.format(row="profits")
+        cur.execute(f"DELETE FROM {table}")
+        cur.execute(f"""INSERT INTO {table} (period, client_id, {', '.join(MEASURES)}, records)
+                        SELECT {period}, COALESCE(client_id, -1), {sums}, COUNT(*) FROM profits GROUP BY 1, 2""")
+        cur.execute(f"""INSERT INTO {table} (period, client_id, {', '.join(MEASURES)}, records)
+                        SELECT {period}, 0, {sums}, COUNT(*) FROM profits GROUP BY 1""")
+
+# ------------------------- READ -------------------------
+FIRM = 0
+
+def _read(db, table, client_id):
+    return pd.read_sql(f"""SELECT period, {', '.join(MEASURES)}, records FROM {table}
+                           WHERE client_id = ? AND records > 0 ORDER BY period""",
+                       db, params=(client_id,))
+
+def monthly(db, client_id=FIRM):
+    """Month rows ('YYYY-MM', oldest first) for one client, or firm-wide by default."""
+    return _read(db, "profit_rollup_monthly", client_id)
+
+def daily(db, client_id=FIRM):
+    """Day rows ('YYYY-MM-DD', oldest first) for one client, or firm-wide by default."""
+    return _read(db, "profit_rollup_daily", client_id)
+
+def totals(db, client_id=FIRM):
+    """All-time sums and record count, from the monthly rows."""
+    row = db.execute(f"""SELECT {', '.join(f'COALESCE(SUM({m}), 0)' for m in MEASURES)}, COALESCE(SUM(records), 0)
+                         FROM profit_rollup_monthly WHERE client_id = ?""", (client_id,)).fetchone()
+    return dict(zip(MEASURES + ["records"], row))
+
+if __name__ == "__main__":
+    import sys
+    from kmfx.db import run_write
+
+    db, _ = run_write(sys.argv[1] if len(sys.argv) > 1 else None, rebuild)
+    for table in PERIODS:
+        count = db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        print(f"Rebuilt {table}: {count} rows")
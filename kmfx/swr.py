@@ -0,0 +1,129 @@
+# ==================== KMFX STALE-WHILE-REVALIDATE LOADERS ====================
+"""Process-wide cache of loader results keyed on source table versions.
+
+Each named loader keeps its last good result and the version it was read at
+(see kmfx/table_versions.py). When the version moves on, a caller that asks
+with ``stale_ok=True`` gets the last good result straight away while a
+background thread re-reads it; everyone else waits for the fresh read as
+usual. Only the very first read of a loader blocks either way, and callers
+asking for a version that is already being read wait for that read instead
+of starting another (which is what makes prefetch useful right after login).
+
+Results are shared between sessions, so DataFrames are handed out as copies.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+REFRESH_WORKERS = 2
+
+
+class _Entry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = None
+        self.version = None    # version the value was read at (None = never loaded)
+        self.loaded_at = None  # time.time() of that read
+        self.inflight = None   # (version, Future) of the read in progress, if any
+
+
+class VersionedCache:
+    def __init__(self, workers=REFRESH_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kmfx-refresh")
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, name):
+        with self._lock:
+            return self._entries.setdefault(name, _Entry())
+
+    def get(self, name, version, load, stale_ok=False):
+        """load() as of ``version``; with stale_ok, the last good result while a newer one is read."""
+        entry = self._entry(name)
+        with entry.lock:
+            if entry.version == version:
+                return _copy(entry.value)
+            if stale_ok and entry.version is not None:
+                if entry.inflight is None:
+                    future = Future()
+                    entry.inflight = (version, future)
+                    self._pool.submit(self._read, entry, version, load, future, True)
+                return _copy(entry.value)
+            # Must be fresh: share a read of this version already in progress, or run one here
+            owner = entry.inflight is None or not _not_older(entry.inflight[0], version)
+            if owner:
+                future = Future()
+                entry.inflight = (version, future)
+            else:
+                future = entry.inflight[1]
+        if owner:
+            self._read(entry, version, load, future)
+        return _copy(future.result())
+
+    def status(self, name):
+        """(loaded_at, refreshing) for a loader; loaded_at is None before the first read."""
+        entry = self._entry(name)
+        with entry.lock:
+            return entry.loaded_at, entry.inflight is not None
+
+    def _read(self, entry, version, load, future, background=False):
+        try:
+            value = load()
+            self._store(entry, version, value)
+            future.set_result(value)
+        except Exception as e:
+            future.set_exception(e)
+            if background:
+                # Keep serving the last good value; the next stale read tries again
+                print(f"Background refresh error: {e}")
+        finally:
+            with entry.lock:
+                if entry.inflight and entry.inflight[1] is future:
+                    entry.inflight = None
+
+    def _store(self, entry, version, value):
+        with entry.lock:
+            # Versions only grow, so never replace a newer read with an older one
+            if entry.version is None or _not_older(version, entry.version):
+                entry.value, entry.version, entry.loaded_at = value, version, time.time()
+
+
+def _not_older(version, than):
+    if isinstance(version, tuple):  # One version per source table
+        return all(a >= b for a, b in zip(version, than))
+    return version >= than
+
+def _copy(value):
+    return value.copy() if hasattr(value, "copy") else value
+
+
+# ------------------------- PROCESS-WIDE CACHE -------------------------
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = VersionedCache()
+    return _cache
+
+def get(name, version, load, stale_ok=False):
+    return get_cache().get(name, version, load, stale_ok)
+
+def status(name):
+    return get_cache().status(name)
+
+def prefetch(loaders):
+    """Call each loader once on its own short-lived thread, without waiting for any of them.
+
+    Pages that ask for the same data meanwhile wait for these reads instead of
+    starting their own.
+    """
+    loaders = list(loaders)
+    if loaders:
+        pool = ThreadPoolExecutor(max_workers=len(loaders), thread_name_prefix="kmfx-warmup")
+        for load in loaders:
+            pool.submit(load)
+        pool.shutdown(wait=False)
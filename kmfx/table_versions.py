@@ -0,0 +1,87 @@
+# ==================== KMFX TABLE VERSIONS ====================
+"""Per-table change counters used as cache keys.
+
+table_versions holds one row per tracked table. Triggers bump a table's
+counter inside the same transaction as any INSERT, UPDATE or DELETE on it,
+so every write path is covered without calling anything. A cached loader is
+keyed on the versions of its source tables (see kmfx/swr.py): its result is
+reused for as long as those tables are unchanged, and a write to some other
+table never evicts it. row_versions does the same for single rows, so a
+session can keep its own copy of a row until that row changes, and for
+per-client feeds (row_id = client_id), so the Notifications page can tell
+that something new arrived for its client without re-reading the feed.
+
+    def load_clients(stale_ok=False):
+        return swr.get("clients", table_versions.get(get_connection(), "clients"), _read_clients, stale_ok)
+"""
+
+TRACKED_TABLES = ["clients", "profits", "withdrawals"]
+
+VERSION_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS table_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID''',
+]
+
+# Per-row counters for rows a session keeps a copy of (the logged-in client's own row)
+TRACKED_ROWS = ["clients"]
+
+ROW_VERSION_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS row_versions (
+        name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        version INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (name, row_id)
+    ) WITHOUT ROWID''',
+]
+
+# Per-client counters (row_id = client_id) for the feeds the Notifications page polls;
+# conversations changes with every message (see kmfx/conversations.py)
+TRACKED_CLIENT_FEEDS = ["notifications", "conversations"]
+# Feeds counted on INSERT only: a client marking a notification read is not news to its own page
+NEW_ROWS_ONLY_FEEDS = ["notifications"]
+
+# ------------------------- MAINTENANCE (RUN INSIDE A WRITE) -------------------------
+def track(cur, table):
+    """Start counting changes to a table (idempotent)."""
+    cur.execute("INSERT OR IGNORE INTO table_versions (name) VALUES (?)", (table,))
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cur.execute(f"""CREATE TRIGGER IF NOT EXISTS version_{table}_{event.lower()} AFTER {event} ON {table}
+                        BEGIN UPDATE table_versions SET version = version + 1 WHERE name = '{table}'; END""")
+
+def track_rows(cur, table, column="id"):
+    """Start counting changes to a table per value of column, its id by default (idempotent)."""
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        cur.execute(f"""CREATE TRIGGER IF NOT EXISTS row_version_{table}_{event.lower()} AFTER {event} ON {table}
+                        BEGIN INSERT INTO row_versions (name, row_id, version)
+                              SELECT '{table}', {row}.{column}, 1 WHERE {row}.{column} IS NOT NULL
+                              ON CONFLICT(name, row_id) DO UPDATE SET version = version + 1; END""")
+
+def count_new_rows_only(cur, table):
+    """Stop counting updates and deletes of a table tracked by track_rows (idempotent)."""
+    for event in ("UPDATE", "DELETE"):
+        cur.execute(f"DROP TRIGGER IF EXISTS row_version_{table}_{event.lower()}")
+
+# ------------------------- READ -------------------------
+def get(db, *tables):
+    """Version of one table, or a tuple of versions in the order given."""
+    found = dict(db.execute(f"SELECT name, version FROM table_versions WHERE name IN ({', '.join('?' * len(tables))})",
+                            tables).fetchall())
+    versions = tuple(found.get(t, 0) for t in tables)
+    return versions[0] if len(tables) == 1 else versions
+
+def row(db, table, row_id):
+    """Version of one row; 0 until the row is first written after tracking starts."""
+    found = db.execute("SELECT version FROM row_versions WHERE name = ? AND row_id = ?", (table, row_id)).fetchone()
+    return found[0] if found else 0
+
+if __name__ == "__main__":
+    import sys
+    from kmfx.db import connect
+    from kmfx.migrations import migrate
+
+    db = connect(sys.argv[1] if len(sys.argv) > 1 else None)
+    migrate(db)
+    for name, version in db.execute("SELECT name, version FROM table_versions ORDER BY name"):
+        print(f"{name:20} {version}")
@@ -0,0 +1,187 @@
+# ==================== KMFX SINGLE WRITER ====================
+"""One background thread owns every write to the database.
+
+A write operation is a function ``op(cursor, *args)``. Callers ``submit`` it
+and get a WriteHandle back, or ``write`` it to block until the result is
+committed (and, with the default synchronous=FULL in kmfx/db.py, on disk).
+The writer drains everything queued since its last commit, runs the
+whole group in one transaction (one fsync for the group) and then resolves
+each handle. Every operation runs under its own SAVEPOINT, so a failing
+operation reports its error to its own caller without discarding the rest
+of the group.
+
+Operations may be retried when the database is busy, so they must only touch
+the database (save uploaded files before or after submitting) and must never
+call ``write`` themselves.
+"""
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+
+from kmfx.db import connect
+
+MAX_BATCH = 500         # operations per group commit
+BUSY_RETRIES = 6        # on top of the connection's busy_timeout
+WRITE_TIMEOUT = 30      # seconds write() waits for its commit
+
+_STOP = object()
+
+def _is_busy(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+def _execute(cur, sql, params):
+    cur.execute(sql, params)
+    return cur.lastrowid
+
+def _executemany(cur, sql, rows):
+    cur.executemany(sql, rows)
+    return cur.rowcount
+
+class WriteHandle:
+    """Completion handle for a submitted write; result() waits until it is committed."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=WRITE_TIMEOUT):
+        if not self._done.wait(timeout):
+            raise TimeoutError("Database write was not committed in time")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def _resolve(self, result=None, error=None):
+        self._result, self._error = result, error
+        self._done.set()
+
+class DatabaseWriter:
+    def __init__(self, path=None):
+        self._path = path
+        self._queue = queue.Queue()
+        self.commits = 0
+        self.operations = 0
+        self._thread = threading.Thread(target=self._run, name="kmfx-db-writer", daemon=True)
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def submit(self, op, *args):
+        handle = WriteHandle()
+        self._queue.put((op, args, handle))
+        return handle
+
+    def stop(self, timeout=10):
+        """Commit everything already queued, then stop the thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    # === WRITER THREAD ===
+    def _run(self):
+        conn = connect(self._path)
+        conn.isolation_level = None  # BEGIN/COMMIT are issued explicitly below
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            # Group commit: everything that queued up while the last commit ran goes in one transaction
+            while len(batch) < MAX_BATCH:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit_batch(conn, batch)
+        conn.close()
+
+    def _commit_batch(self, conn, batch):
+        for attempt in range(BUSY_RETRIES + 1):
+            try:
+                outcomes = self._apply(conn, batch)
+                break
+            except sqlite3.OperationalError as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                if not _is_busy(e) or attempt == BUSY_RETRIES:
+                    for _, _, handle in batch:
+                        handle._resolve(error=e)
+                    return
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                for _, _, handle in batch:
+                    handle._resolve(error=e)
+                return
+
+        self.commits += 1
+        self.operations += len(batch)
+        for (_, _, handle), (result, error) in zip(batch, outcomes):
+            handle._resolve(result, error)
+
+    def _apply(self, conn, batch):
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        outcomes = []
+        for op, args, _ in batch:
+            cur.execute("SAVEPOINT op")
+            try:
+                result = op(cur, *args)
+            except sqlite3.OperationalError as e:
+                if _is_busy(e):
+                    raise  # Retry the whole group
+                cur.execute("ROLLBACK TO op")
+                outcomes.append((None, e))
+            except Exception as e:
+                cur.execute("ROLLBACK TO op")
+                outcomes.append((None, e))
+            else:
+                outcomes.append((result, None))
+            cur.execute("RELEASE op")
+        cur.execute("COMMIT")
+        return outcomes
+
+# ------------------------- PROCESS-WIDE WRITER -------------------------
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = DatabaseWriter()
+            atexit.register(_writer.stop)
+    return _writer
+
+def submit(op, *args):
+    """Queue op(cursor, *args) and return its WriteHandle without waiting."""
+    return get_writer().submit(op, *args)
+
+def write(op, *args):
+    """Run op(cursor, *args) on the writer and wait until it is committed."""
+    return submit(op, *args).result()
+
+def execute(sql, params=()):
+    """Run one statement on the writer, wait for the commit and return lastrowid."""
+    return write(_execute, sql, params)
+
+def executemany(sql, rows):
+    return write(_executemany, sql, rows)